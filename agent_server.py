@@ -0,0 +1,505 @@
+"""Multi-session chat agent server.
+
+Run with: uvicorn agent_server:app --port 8000 [--workers 4 with SESSION_BACKEND=sqlite]
+
+Each session has its own conversation history. A turn is posted to
+POST /sessions/{id}/messages and streamed back as server-sent events (or sent
+over the WebSocket at /sessions/{id}/ws):
+  text         assistant text as the LLM writes it
+  tool_call    a tool the assistant asked for, with its arguments
+  tool_delta   summary text streamed by a lone pdf_summarize call
+  tool_result  a tool's output
+  done         end of the turn (or "error"; the turn is then not kept)
+All sessions share one LLM client and one connection pool per tool server.
+"""
+import asyncio
+import json
+import time
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import httpx
+from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+from llm_client import AsyncLLMClient
+from config import (
+    PAPER_SEARCH_SERVER_URL,
+    PDF_SUMMARIZE_SERVER_URL,
+    TOOL_MAX_PARALLEL,
+    TOOL_CONCURRENCY_LIMITS,
+    HISTORY_MAX_TOKENS,
+    HISTORY_KEEP_RECENT_TURNS,
+    TOOL_CALL_LOGGING,
+    PDF_SUMMARY_STREAMING,
+    PDF_PREFETCH_TOP_K,
+    TOOL_DEADLINE_SECONDS,
+    TOOL_ATTEMPT_TIMEOUT_SECONDS,
+    TOOL_MAX_RETRIES,
+    TOOL_RETRY_BACKOFF_BASE,
+    TOOL_RETRY_BACKOFF_MAX,
+    TOOL_HEDGE_QUANTILE,
+    TOOL_BREAKER_FAILURES,
+    TOOL_BREAKER_RESET_SECONDS,
+    SESSION_BACKEND,
+    SESSION_PATH,
+    SESSION_IDLE_SECONDS,
+    SESSION_MAX_ENTRIES,
+    AGENT_TOOL_CONNECTIONS,
+    AGENT_MAX_TOOL_ROUNDS,
+)
+from utils import sse
+from utils.logger import configure_logging, log_tool_call
+from utils.metrics import REGISTRY, instrument_app
+from utils.cache_backends import MemoryBackend, SQLiteBackend
+from utils.sessions import SessionBusy, SessionConflict, SessionNotFound, SessionStore
+from utils.tool_transport import AsyncToolTransport
+
+SYSTEM_PROMPT = "You are a helpful AI assistant that helps users discover and summarize recent research papers using the available tools. When searching, try to be specific about the query and number of results. For summarization, request a PDF URL."
+
+Emit = Callable[[str, Dict[str, Any]], None]
+
+# The session whose turn is running, for tool calls that act on its behalf.
+current_session: ContextVar[Optional[str]] = ContextVar("current_session", default=None)
+
+AGENT_TURN_SECONDS = REGISTRY.histogram(
+    "scout_agent_turn_duration_seconds", "Time to run one user turn, tools included.", ("outcome",)
+)
+
+# Keep-alive connections, deadlines, retries and circuit breaking for each tool server
+def _make_transport(name: str, base_url: str) -> AsyncToolTransport:
+    return AsyncToolTransport(
+        name,
+        base_url,
+        pool_size=AGENT_TOOL_CONNECTIONS,
+        deadline=TOOL_DEADLINE_SECONDS[name],
+        attempt_timeout=TOOL_ATTEMPT_TIMEOUT_SECONDS[name],
+        max_retries=TOOL_MAX_RETRIES,
+        backoff_base=TOOL_RETRY_BACKOFF_BASE,
+        backoff_max=TOOL_RETRY_BACKOFF_MAX,
+        hedge_quantile=TOOL_HEDGE_QUANTILE,
+        breaker_failures=TOOL_BREAKER_FAILURES,
+        breaker_reset_seconds=TOOL_BREAKER_RESET_SECONDS,
+    )
+
+paper_search_transport = _make_transport("paper_search", PAPER_SEARCH_SERVER_URL)
+pdf_summarize_transport = _make_transport("pdf_summarize", PDF_SUMMARIZE_SERVER_URL)
+
+if SESSION_BACKEND == "memory":
+    sessions = SessionStore(MemoryBackend(SESSION_MAX_ENTRIES), SESSION_IDLE_SECONDS,
+                            HISTORY_MAX_TOKENS, HISTORY_KEEP_RECENT_TURNS, SYSTEM_PROMPT)
+elif SESSION_BACKEND == "sqlite":
+    sessions = SessionStore(SQLiteBackend(SESSION_PATH, SESSION_MAX_ENTRIES, table="sessions"), SESSION_IDLE_SECONDS,
+                            HISTORY_MAX_TOKENS, HISTORY_KEEP_RECENT_TURNS, SYSTEM_PROMPT)
+else:
+    raise ValueError(f"Unsupported SESSION_BACKEND: {SESSION_BACKEND}")
+
+llm = AsyncLLMClient()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    configure_logging(TOOL_CALL_LOGGING)
+    await paper_search_transport.start()
+    await pdf_summarize_transport.start()
+    yield
+    await paper_search_transport.aclose()
+    await pdf_summarize_transport.aclose()
+    await llm.aclose()
+
+app = FastAPI(lifespan=lifespan)
+instrument_app(app, "agent")
+
+class MessageRequest(BaseModel):
+    content: str
+
+# --- Tool Execution Functions ---
+# Fire-and-forget prefetch requests; referenced here until done so they are not garbage collected.
+_background_tasks = set()
+
+async def _request_prefetch(pdf_urls: List[str], session_id: Optional[str]):
+    try:
+        payload = {"pdf_urls": pdf_urls, "session_id": session_id}
+        response = await pdf_summarize_transport.post("/pdf_prefetch", payload, idempotent=False, deadline=5)
+        await response.aclose()
+    except httpx.HTTPError:
+        pass  # Only an optimization; the summarize call works without it.
+
+def prefetch_top_pdfs(papers: List[Dict[str, Any]]):
+    """Asks the pdf_summarize server to start on the top PDF_PREFETCH_TOP_K results the user may ask about next."""
+    pdf_urls = [p["pdf_url"] for p in papers[:PDF_PREFETCH_TOP_K] if p.get("pdf_url")]
+    if pdf_urls:
+        # Tagged with the session, so this search replaces only the session's own queued prefetches.
+        task = asyncio.ensure_future(_request_prefetch(pdf_urls, current_session.get()))
+        _background_tasks.add(task)
+        task.add_done_callback(_background_tasks.discard)
+
+def _format_papers(papers: List[Dict[str, Any]]) -> str:
+    return "\n\n".join([
+        f"Title: {p.get('title', 'N/A')}\nAuthors: {', '.join(p.get('authors', ['N/A']))}\nPublished: {p.get('published', 'N/A')}\nPDF URL: {p.get('pdf_url', 'N/A')}"
+        for p in papers
+    ])
+
+async def execute_paper_search_tool(emit: Emit, query: str, max_results: int = 5) -> Dict[str, Any]:
+    """Calls the paper_search MCP server."""
+    payload = {"query": query, "max_results": max_results}
+    start_time = time.time()
+    outcome = "unknown"
+    try:
+        response = await paper_search_transport.post("/paper_search", payload)
+        response.raise_for_status()
+        result = response.json()
+        outcome = "success"
+
+        if result.get("status") == "success":
+            papers = result.get("papers", [])
+            if papers:
+                prefetch_top_pdfs(papers)
+                return {"tool_output": f"Found {len(papers)} papers:\n{_format_papers(papers)}"}
+            else:
+                return {"tool_output": "No papers found for your query."}
+        else:
+            outcome = "failure"
+            return {"tool_output": f"Error from paper_search server: {result.get('detail', 'Unknown error')}"}
+    except httpx.HTTPError as e:
+        outcome = "failure"
+        return {"tool_output": f"Failed to call paper_search tool: {e}"}
+    except json.JSONDecodeError as e:
+        outcome = "failure"
+        return {"tool_output": f"Failed to decode JSON from paper_search server: {e}. Response: {response.text}"}
+    finally:
+        latency = time.time() - start_time
+        log_tool_call("paper_search", payload, latency, outcome)
+
+async def execute_similar_papers_tool(emit: Emit, pdf_url: str, max_results: int = 5) -> Dict[str, Any]:
+    """Asks the paper_search server for indexed papers similar to `pdf_url`."""
+    payload = {"pdf_url": pdf_url, "max_results": max_results}
+    start_time = time.time()
+    outcome = "unknown"
+    try:
+        response = await paper_search_transport.post("/paper_similar", payload)
+        result = response.json()
+        if response.is_success and result.get("status") == "success":
+            outcome = "success"
+            papers = result.get("papers", [])
+            if papers:
+                return {"tool_output": f"Found {len(papers)} similar papers:\n{_format_papers(papers)}"}
+            return {"tool_output": "No similar papers found in the local index."}
+        outcome = "failure"
+        return {"tool_output": f"Error from paper_search server: {result.get('detail', 'Unknown error')}"}
+    except httpx.HTTPError as e:
+        outcome = "failure"
+        return {"tool_output": f"Failed to call similar_papers tool: {e}"}
+    except json.JSONDecodeError as e:
+        outcome = "failure"
+        return {"tool_output": f"Failed to decode JSON from paper_search server: {e}. Response: {response.text}"}
+    finally:
+        latency = time.time() - start_time
+        log_tool_call("similar_papers", payload, latency, outcome)
+
+async def _read_summary_stream(response: httpx.Response, emit: Emit) -> Dict[str, Any]:
+    """Forwards a streamed (SSE) summary as tool_delta events and returns the final result."""
+    async for event, data in sse.aiter_events(response.aiter_lines()):
+        if event == "delta":
+            emit("tool_delta", {"name": "pdf_summarize", "text": data["text"]})
+        elif event == "done":
+            return data
+        elif event == "error":
+            return {"status": "error", "detail": data.get("detail")}
+    return {"status": "error", "detail": "Summary stream ended before the summary was complete."}
+
+async def execute_pdf_summarize_tool(emit: Emit, pdf_url: str, mode: str = "fast", stream: bool = False) -> Dict[str, Any]:
+    """Calls the pdf_summarize MCP server; with `stream`, forwards the summary while it is written."""
+    payload = {"pdf_url": pdf_url, "mode": mode}
+    start_time = time.time()
+    outcome = "unknown"
+    try:
+        if stream:
+            async with pdf_summarize_transport.stream("/pdf_summarize", {**payload, "stream": True}) as response:
+                response.raise_for_status()
+                result = await _read_summary_stream(response, emit)
+        else:
+            response = await pdf_summarize_transport.post("/pdf_summarize", payload)
+            response.raise_for_status()
+            result = response.json()
+        outcome = "success"
+
+        if result.get("status") == "success":
+            return {"tool_output": f"Summary: {result.get('summary')}"}
+        else:
+            outcome = "failure"
+            return {"tool_output": f"Error from pdf_summarize server: {result.get('detail', 'Unknown error')}"}
+    except httpx.HTTPError as e:
+        outcome = "failure"
+        return {"tool_output": f"Failed to call pdf_summarize tool: {e}"}
+    except json.JSONDecodeError as e:
+        outcome = "failure"
+        return {"tool_output": f"Failed to decode JSON from pdf_summarize server: {e}. Response: {response.text}"}
+    finally:
+        latency = time.time() - start_time
+        log_tool_call("pdf_summarize", payload, latency, outcome)
+
+async def execute_pdf_summarize_batch(pdf_urls: List[str], mode: str = "fast") -> List[Dict[str, Any]]:
+    """Summarizes several PDFs with one /pdf_summarize_batch call; outputs come back in the order given."""
+    payload = {"pdf_urls": pdf_urls, "mode": mode}
+    outputs: List[Any] = [None] * len(pdf_urls)
+    start_time = time.time()
+    try:
+        async with pdf_summarize_transport.stream("/pdf_summarize_batch", payload) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if not line:
+                    continue
+                result = json.loads(line)
+                if result.get("status") == "done":
+                    break
+                index = result["index"]
+                if result["status"] == "success":
+                    outputs[index] = {"tool_output": f"Summary: {result.get('summary')}"}
+                    outcome = "success"
+                else:
+                    outputs[index] = {"tool_output": f"Error from pdf_summarize server: {result.get('detail', 'Unknown error')}"}
+                    outcome = "failure"
+                log_tool_call("pdf_summarize", {"pdf_url": pdf_urls[index], "mode": mode}, time.time() - start_time, outcome)
+    except (httpx.HTTPError, json.JSONDecodeError, KeyError) as e:
+        error = f"Failed to call pdf_summarize tool: {e}"
+        for index, output in enumerate(outputs):
+            if output is None:
+                outputs[index] = {"tool_output": error}
+                log_tool_call("pdf_summarize", {"pdf_url": pdf_urls[index], "mode": mode}, time.time() - start_time, "failure")
+
+    return [output or {"tool_output": "Failed to call pdf_summarize tool: no result returned."} for output in outputs]
+
+TOOL_EXECUTORS = {
+    "paper_search": execute_paper_search_tool,
+    "similar_papers": execute_similar_papers_tool,
+    "pdf_summarize": execute_pdf_summarize_tool,
+}
+
+def _summarize_batches(tool_calls: List[Tuple[str, Dict[str, Any]]]) -> Dict[str, List[int]]:
+    """Positions of pdf_summarize calls that can share one batch request, grouped by mode."""
+    batches: Dict[str, List[int]] = {}
+    for position, (name, arguments) in enumerate(tool_calls):
+        if name == "pdf_summarize" and set(arguments) <= {"pdf_url", "mode"} and "pdf_url" in arguments:
+            batches.setdefault(arguments.get("mode", "fast"), []).append(position)
+    return {mode: positions for mode, positions in batches.items() if len(positions) > 1}
+
+async def execute_tool_calls(tool_calls: List[Tuple[str, Dict[str, Any]]], emit: Emit) -> List[Dict[str, Any]]:
+    """Runs one turn's tool calls concurrently and returns their outputs in the order given.
+
+    Several pdf_summarize calls go to the server as a single batch; a lone one streams.
+    The per-tool caps apply within the turn, so one session cannot hold back another.
+    """
+    turn_slots = asyncio.Semaphore(TOOL_MAX_PARALLEL)
+    tool_slots = {name: asyncio.Semaphore(TOOL_CONCURRENCY_LIMITS.get(name, TOOL_MAX_PARALLEL)) for name in TOOL_EXECUTORS}
+
+    async def run_one(name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        executor = TOOL_EXECUTORS.get(name)
+        if executor is None:
+            return {"tool_output": f"Unknown tool: {name}"}
+        async with turn_slots, tool_slots[name]:
+            return await executor(emit, **arguments)
+
+    if len(tool_calls) == 1:
+        name, arguments = tool_calls[0]
+        if name == "pdf_summarize" and PDF_SUMMARY_STREAMING:
+            arguments = {**arguments, "stream": True}
+        return [await run_one(name, arguments)]
+
+    batches = _summarize_batches(tool_calls)
+    batched = {position for positions in batches.values() for position in positions}
+
+    async def run_batch(pdf_urls: List[str], mode: str) -> List[Dict[str, Any]]:
+        async with turn_slots, tool_slots["pdf_summarize"]:
+            return await execute_pdf_summarize_batch(pdf_urls, mode)
+
+    singles = {
+        position: asyncio.ensure_future(run_one(name, arguments))
+        for position, (name, arguments) in enumerate(tool_calls)
+        if position not in batched
+    }
+    batch_tasks = {
+        mode: asyncio.ensure_future(run_batch([tool_calls[position][1]["pdf_url"] for position in positions], mode))
+        for mode, positions in batches.items()
+    }
+    try:
+        outputs: List[Dict[str, Any]] = [{}] * len(tool_calls)
+        for position, task in singles.items():
+            outputs[position] = await task
+        for mode, task in batch_tasks.items():
+            for position, output in zip(batches[mode], await task):
+                outputs[position] = output
+        return outputs
+    finally:
+        for task in [*singles.values(), *batch_tasks.values()]:
+            task.cancel()
+
+# --- Turns ---
+async def _stream_assistant_message(messages: List[Dict[str, Any]], emit: Emit) -> Dict[str, Any]:
+    """Streams one completion, forwarding text, and returns the accumulated assistant message."""
+    content = ""
+    tool_calls_by_id: Dict[str, Dict[str, Any]] = {}
+    tool_calls_ordered: List[Dict[str, Any]] = []
+    async for chunk in llm.generate_response(messages):
+        if llm.provider != "openai":
+            continue
+        delta = chunk.choices[0].delta
+        if delta.content:
+            emit("text", {"text": delta.content})
+            content += delta.content
+
+        for tool_call_delta in delta.tool_calls or []:
+            if tool_call_delta.id:
+                tool_calls_by_id[tool_call_delta.id] = {
+                    "id": tool_call_delta.id,
+                    "type": "function",
+                    "function": {"name": tool_call_delta.function.name, "arguments": ""},
+                }
+                tool_calls_ordered.append(tool_calls_by_id[tool_call_delta.id])
+                target = tool_calls_by_id[tool_call_delta.id]
+            elif tool_calls_ordered:
+                # Later chunks of a call's arguments come without its id.
+                target = tool_calls_ordered[-1]
+            else:
+                continue  # Cannot be associated with any tool call.
+            target["function"]["arguments"] += tool_call_delta.function.arguments or ""
+
+    message: Dict[str, Any] = {"role": "assistant"}
+    if content:
+        message["content"] = content.strip()
+    tool_calls = [tc for tc in tool_calls_ordered if tc["function"]["arguments"].strip() or tc["function"]["name"]]
+    if tool_calls:
+        message["tool_calls"] = tool_calls
+    return message
+
+async def run_turn(history, content: str, emit: Emit):
+    """Runs one user turn against `history`, emitting events; raises on failure (the caller drops the turn)."""
+    history.append({"role": "user", "content": content})
+    for round_number in range(AGENT_MAX_TOOL_ROUNDS + 1):
+        message = await _stream_assistant_message(history.messages, emit)
+        tool_calls = message.get("tool_calls", [])
+        if round_number == AGENT_MAX_TOOL_ROUNDS and tool_calls:
+            # Out of tool rounds: keep the text only, so no call is left without its result.
+            del message["tool_calls"]
+            tool_calls = []
+        if "content" in message or tool_calls:
+            history.append(message)
+        if not tool_calls:
+            return
+
+        parsed_tool_calls = []
+        for tool_call in tool_calls:
+            arguments = json.loads(tool_call["function"]["arguments"] or "{}")
+            emit("tool_call", {"name": tool_call["function"]["name"], "arguments": arguments})
+            parsed_tool_calls.append((tool_call["function"]["name"], arguments))
+
+        # Run every tool call from this round concurrently; results come back in request order.
+        tool_outputs = await execute_tool_calls(parsed_tool_calls, emit)
+        for tool_call, output in zip(tool_calls, tool_outputs):
+            emit("tool_result", {"name": tool_call["function"]["name"], "output": output["tool_output"]})
+            history.append({
+                "role": "tool",
+                "tool_call_id": tool_call["id"],
+                "name": tool_call["function"]["name"],
+                "content": output["tool_output"],
+            })
+
+async def _turn_events(session_id: str, content: str):
+    """Runs a turn in the background and yields its (event, data) pairs as they are emitted."""
+    events: asyncio.Queue = asyncio.Queue()
+
+    def emit(event: str, data: Dict[str, Any]):
+        events.put_nowait((event, data))
+
+    async def run():
+        current_session.set(session_id)
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            async with sessions.turn(session_id) as history:
+                await run_turn(history, content, emit)
+            outcome = "ok"
+            emit("done", {"status": "success"})
+        except SessionNotFound:
+            emit("error", {"status_code": 404, "detail": "Unknown or expired session."})
+        except SessionBusy:
+            emit("error", {"status_code": 409, "detail": "A turn is already running for this session."})
+        except SessionConflict:
+            emit("error", {"status_code": 409, "detail": "Another turn updated this session first; this turn was not kept."})
+        except json.JSONDecodeError as e:
+            emit("error", {"status_code": 502, "detail": f"Could not parse tool arguments from the LLM: {e}"})
+        except asyncio.CancelledError:
+            outcome = "abandoned"
+            raise
+        except Exception as e:
+            emit("error", {"status_code": 500, "detail": f"An unexpected error occurred during LLM interaction: {e}"})
+        finally:
+            AGENT_TURN_SECONDS.observe(time.perf_counter() - started, outcome=outcome)
+            events.put_nowait(None)
+
+    task = asyncio.ensure_future(run())
+    try:
+        while True:
+            item = await events.get()
+            if item is None:
+                return
+            yield item
+    finally:
+        # The client went away: stop work nobody will read (the turn is then not kept).
+        task.cancel()
+
+def _check_session(session_id: str):
+    # Fail with a plain HTTP status before the event stream starts, where possible.
+    try:
+        sessions.load(session_id)
+    except SessionNotFound:
+        raise HTTPException(status_code=404, detail="Unknown or expired session.")
+    if sessions.is_running(session_id):
+        raise HTTPException(status_code=409, detail="A turn is already running for this session.")
+
+# --- Endpoints ---
+@app.post("/sessions", status_code=201)
+async def create_session():
+    return {"session_id": sessions.create()}
+
+@app.delete("/sessions/{session_id}")
+async def delete_session(session_id: str):
+    sessions.delete(session_id)
+    return {"status": "success"}
+
+@app.get("/sessions/{session_id}")
+async def get_session(session_id: str):
+    try:
+        return {"session_id": session_id, "messages": sessions.load(session_id).messages}
+    except SessionNotFound:
+        raise HTTPException(status_code=404, detail="Unknown or expired session.")
+
+@app.post("/sessions/{session_id}/messages")
+async def post_message(session_id: str, request: MessageRequest):
+    _check_session(session_id)
+
+    async def stream():
+        async for event, data in _turn_events(session_id, request.content):
+            yield sse.encode(event, data)
+
+    return StreamingResponse(
+        stream(), media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.websocket("/sessions/{session_id}/ws")
+async def session_socket(websocket: WebSocket, session_id: str):
+    """Each {"content": ...} message runs a turn; events come back as {"event": ..., "data": ...} messages."""
+    await websocket.accept()
+    try:
+        while True:
+            message = await websocket.receive_json()
+            async for event, data in _turn_events(session_id, message.get("content") or ""):
+                await websocket.send_json({"event": event, "data": data})
+    except WebSocketDisconnect:
+        pass
+
+@app.get("/session_stats")
+async def session_stats():
+    return sessions.stats()
@@ -0,0 +1,136 @@
+"""Turn latency of the agent server with one session versus hundreds running at once.
+
+Usage: python -m benchmarks.bench_agent_sessions [--levels 1,100,200] [--turns 3] [--think-time 20] [--agent-workers 1]
+
+Starts local stand-ins for the LLM and arXiv, the paper_search server and the
+agent server. Each session posts `--turns` messages, pausing about
+`--think-time` seconds between them like a user reading the answer; sessions
+start staggered over one think time. Every turn is a paper_search tool call
+followed by a streamed answer. With sessions that do not block one another,
+p50 turn latency should stay close to the single-session figure as the number
+of open sessions grows, until the machine runs out of CPU. With
+--agent-workers above 1 sessions live in the SQLite backend, so any worker
+can serve any turn.
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+from typing import List, Tuple
+
+import httpx
+
+from benchmarks.bench_paper_search import start_server, wait_until_up
+from benchmarks.loadgen import percentile
+
+ARXIV_PORT = 9301
+LLM_PORT = 9303
+SEARCH_PORT = 9311
+AGENT_PORT = 9320
+
+async def run_session(
+    client: httpx.AsyncClient, session_number: int, turns: int, think_time: float, rng: random.Random,
+) -> List[Tuple[float, float, bool]]:
+    """(first event seconds, turn seconds, ok) for each turn of one session."""
+    await asyncio.sleep(rng.uniform(0, think_time))
+    response = await client.post("/sessions")
+    response.raise_for_status()
+    session_id = response.json()["session_id"]
+    results = []
+    for turn in range(turns):
+        if turn:
+            await asyncio.sleep(think_time * rng.uniform(0.5, 1.5))
+        start = time.perf_counter()
+        first_event = None
+        ok = False
+        # Distinct queries, so every turn misses the search cache.
+        content = f"papers about topic {session_number} part {turn}"
+        async with client.stream("POST", f"/sessions/{session_id}/messages", json={"content": content}) as response:
+            response.raise_for_status()
+            # Only the event names are needed, so the JSON payloads are not decoded.
+            async for line in response.aiter_lines():
+                if not line.startswith("event:"):
+                    continue
+                if first_event is None:
+                    first_event = time.perf_counter() - start
+                event = line[len("event:"):].strip()
+                if event in ("done", "error"):
+                    ok = event == "done"
+                    break
+        results.append((first_event or 0.0, time.perf_counter() - start, ok))
+    await client.delete(f"/sessions/{session_id}")
+    return results
+
+async def run_level(sessions: int, turns: int, think_time: float) -> Tuple[List[Tuple[float, float, bool]], float]:
+    # Drop idle connections before uvicorn does (after 5s), so none is reused as the server closes it.
+    limits = httpx.Limits(max_connections=sessions, max_keepalive_connections=sessions, keepalive_expiry=4)
+    rng = random.Random(sessions)
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{AGENT_PORT}", limits=limits, timeout=120) as client:
+        start = time.perf_counter()
+        per_session = await asyncio.gather(*(run_session(client, i, turns, think_time, rng) for i in range(sessions)))
+        elapsed = time.perf_counter() - start
+    return [result for results in per_session for result in results], elapsed
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--levels", default="1,100,200")
+    parser.add_argument("--turns", type=int, default=3)
+    parser.add_argument("--think-time", type=float, default=20)
+    parser.add_argument("--arxiv-latency", type=float, default=0.2)
+    parser.add_argument("--llm-ttft", type=float, default=0.5)
+    # Few, slow tokens: every chunk costs CPU in the stand-in LLM, the agent server and this client.
+    parser.add_argument("--llm-tokens-per-second", type=float, default=10)
+    parser.add_argument("--llm-output-tokens", type=int, default=20)
+    parser.add_argument("--agent-workers", type=int, default=1)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="scout-agent-bench-")
+    servers = [
+        start_server("benchmarks.fake_arxiv:app", ARXIV_PORT, {"ARXIV_FAKE_LATENCY": str(args.arxiv_latency)}),
+        start_server("benchmarks.fake_llm:app", LLM_PORT, {
+            "LLM_FAKE_TTFT": str(args.llm_ttft),
+            "LLM_FAKE_TOKENS_PER_SECOND": str(args.llm_tokens_per_second),
+            "LLM_FAKE_OUTPUT_TOKENS": str(args.llm_output_tokens),
+        }),
+        start_server("tools.paper_search_server:app", SEARCH_PORT, {
+            "ARXIV_API_URL": f"http://127.0.0.1:{ARXIV_PORT}/api/query",
+            "ARXIV_INDEX_PATH": os.path.join(workdir, "arxiv_index.sqlite3"),
+            "SIMILARITY_INDEX_DIR": os.path.join(workdir, "similarity"),
+            # The stand-in arXiv is the only upstream host, so let it take every concurrent search.
+            "HTTP_MAX_CONNECTIONS_PER_HOST": "500",
+            "HTTP_MAX_CONNECTIONS": "500",
+        }),
+        start_server("agent_server:app", AGENT_PORT, {
+            "OPENAI_BASE_URL": f"http://127.0.0.1:{LLM_PORT}/v1",
+            "OPENAI_API_KEY": os.environ.get("OPENAI_API_KEY", "offline-benchmark"),
+            "LLM_PROVIDER": "openai",
+            # Measure the agent server, not the limiter meant for real provider quotas.
+            "LLM_MAX_CONCURRENT_REQUESTS": "1000",
+            "LLM_HTTP_MAX_CONNECTIONS": "1000",
+            "PAPER_SEARCH_SERVER_URL": f"http://127.0.0.1:{SEARCH_PORT}",
+            "AGENT_TOOL_CONNECTIONS": "500",
+            "TOOL_CALL_LOGGING": "false",
+            "PDF_PREFETCH_TOP_K": "0",
+            "SESSION_BACKEND": "sqlite" if args.agent_workers > 1 else "memory",
+            "SESSION_PATH": os.path.join(workdir, "sessions.sqlite3"),
+        }, workers=args.agent_workers),
+    ]
+    try:
+        for port in (ARXIV_PORT, LLM_PORT, SEARCH_PORT, AGENT_PORT):
+            wait_until_up(f"http://127.0.0.1:{port}/docs")
+        print(f"{'sessions':>9} {'turns/s':>8} {'first p50':>10} {'turn p50':>9} {'turn p95':>9} {'turn max':>9} {'errors':>7}")
+        for level in [int(x) for x in args.levels.split(",")]:
+            results, elapsed = asyncio.run(run_level(level, args.turns, args.think_time))
+            first = sorted(r[0] for r in results)
+            turn = sorted(r[1] for r in results)
+            errors = sum(1 for r in results if not r[2])
+            print(f"{level:>9} {len(results) / elapsed:>8.1f} {percentile(first, 0.5):>9.2f}s "
+                  f"{percentile(turn, 0.5):>8.2f}s {percentile(turn, 0.95):>8.2f}s {turn[-1]:>8.2f}s {errors:>7}")
+    finally:
+        for server in servers:
+            server.terminate()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Micro-benchmark of arXiv Atom parsing and response serialization.
+
+Usage: python -m benchmarks.bench_atom_parse [--sizes 10,100,2000] [--repeat 20]
+
+Compares the original ElementTree find()/dict pipeline with the streaming
+iterparse path that yields Paper records and encodes them with utils.fast_json.
+"""
+import argparse
+import json
+import statistics
+import time
+import xml.etree.ElementTree as ET
+
+from benchmarks.fixtures import make_atom_feed
+from utils import fast_json
+from utils.arxiv_feed import lxml_etree, parse_feed
+
+def legacy_parse(content: bytes):
+    root = ET.fromstring(content)
+    ns = {'atom': 'http://www.w3.org/2005/Atom'}
+    papers = []
+    for entry in root.findall('atom:entry', ns):
+        pdf_link = None
+        for link in entry.findall('atom:link', ns):
+            if link.get('title') == 'pdf':
+                pdf_link = link.get('href')
+                break
+        papers.append({
+            "title": entry.find('atom:title', ns).text.strip(),
+            "authors": [author.find('atom:name', ns).text for author in entry.findall('atom:author', ns)],
+            "published": entry.find('atom:published', ns).text,
+            "summary": entry.find('atom:summary', ns).text.strip(),
+            "pdf_url": pdf_link,
+        })
+    return papers
+
+def legacy_serialize(papers) -> bytes:
+    return json.dumps({"status": "success", "papers": papers}).encode("utf-8")
+
+def fast_serialize(papers) -> bytes:
+    return fast_json.dumps({"status": "success", "papers": papers})
+
+def best_ms(fn, arg, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(arg)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="10,100,2000")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"parser backend: {'lxml' if lxml_etree is not None else 'xml.etree'}, "
+          f"json encoder: {'orjson' if fast_json.orjson is not None else 'json'}")
+    print(f"{'entries':>8} {'legacy parse':>13} {'fast parse':>11} {'legacy json':>12} {'fast json':>10}   (median ms)")
+    for size in [int(s) for s in args.sizes.split(",")]:
+        feed = make_atom_feed(size)
+        legacy_papers = legacy_parse(feed)
+        papers = parse_feed(feed)
+        assert [p.to_dict() for p in papers] == legacy_papers
+        print(
+            f"{size:>8} "
+            f"{best_ms(legacy_parse, feed, args.repeat):>13.2f} "
+            f"{best_ms(parse_feed, feed, args.repeat):>11.2f} "
+            f"{best_ms(legacy_serialize, legacy_papers, args.repeat):>12.2f} "
+            f"{best_ms(fast_serialize, papers, args.repeat):>10.2f}"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""Cost of the metrics instrumentation relative to request time.
+
+Usage: python -m benchmarks.bench_metrics_overhead [--requests 2000]
+
+Times a cached /paper_search hit in-process (the cheapest real request, so
+the worst case for relative overhead), counts the metric observations it
+makes, and compares their cost plus the latency middleware's with the
+request time. The budget is 1%. Requests here skip the network and uvicorn,
+so against a served endpoint the share is lower still.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+import httpx
+
+from utils.metrics import REGISTRY, Histogram, RequestLatencyMiddleware, span
+
+OVERHEAD_BUDGET = 0.01
+
+def per_call_ns(fn, calls: int = 200_000) -> float:
+    start = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return (time.perf_counter() - start) / calls * 1e9
+
+def observation_count() -> int:
+    return sum(
+        series[2]
+        for metric in list(REGISTRY._metrics.values())
+        if isinstance(metric, Histogram)
+        for series in list(metric._series.values())
+    )
+
+async def empty_app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b""})
+
+async def asgi_call_ns(app, calls: int = 50_000) -> float:
+    """Per-call time of invoking an ASGI app directly, without any client or server around it."""
+    scope = {"type": "http", "path": "/", "method": "GET"}
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        pass
+
+    start = time.perf_counter()
+    for _ in range(calls):
+        await app(scope, receive, send)
+    return (time.perf_counter() - start) / calls * 1e9
+
+async def median_request_seconds(app, method: str, path: str, total: int, **kwargs) -> float:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        timings = []
+        for _ in range(total):
+            start = time.perf_counter()
+            r = await client.request(method, path, **kwargs)
+            timings.append(time.perf_counter() - start)
+            r.raise_for_status()
+    return statistics.median(timings)
+
+async def run(total: int):
+    histogram = Histogram("bench_histogram", "bench", ("component", "stage"))
+    observe_ns = per_call_ns(lambda: histogram.observe(0.01, component="bench", stage="x"))
+
+    def timed_block():
+        with span("bench", "noop"):
+            pass
+    span_ns = per_call_ns(timed_block)
+
+    bare_ns = await asgi_call_ns(empty_app)
+    middleware_ns = max(await asgi_call_ns(RequestLatencyMiddleware(empty_app, "bench")) - bare_ns, 0.0)
+
+    # Imported late so the servers' caches and index live in a throwaway directory.
+    workdir = tempfile.mkdtemp()
+    os.environ.setdefault("QUERY_CACHE_BACKEND", "memory")
+    os.environ.setdefault("ARXIV_INDEX_PATH", os.path.join(workdir, "index.sqlite3"))
+    os.environ.setdefault("SIMILARITY_INDEX_DIR", os.path.join(workdir, "similarity"))
+    from benchmarks.fixtures import make_atom_feed
+    from tools import paper_search_server as server
+    from utils.arxiv_feed import parse_feed
+
+    payload = {"query": "metrics overhead", "max_results": 5}
+    # Prime the cache with as many candidates as the server asks for (more when it re-ranks).
+    candidates = payload["max_results"] * server.CANDIDATE_FACTOR
+    papers = parse_feed(make_atom_feed(candidates))
+    await server.query_cache.get_or_fetch(payload["query"], candidates, lambda: asyncio.sleep(0, result=papers))
+
+    before = observation_count()
+    request_s = await median_request_seconds(server.app, "POST", "/paper_search", total, json=payload)
+    observations = (observation_count() - before) / total
+
+    # Middleware observations are already inside middleware_ns.
+    overhead_ns = (observations - 1) * observe_ns + middleware_ns
+    ratio = overhead_ns / (request_s * 1e9)
+    print(f"histogram observe: {observe_ns:8.0f} ns")
+    print(f"span():            {span_ns:8.0f} ns")
+    print(f"latency middleware:{middleware_ns:8.0f} ns per request")
+    print(f"cached /paper_search: {request_s * 1e6:.0f} us median, {observations:.1f} observations per request")
+    print(f"instrumentation overhead: {ratio:.2%} of request time (budget {OVERHEAD_BUDGET:.0%}) "
+          f"-> {'OK' if ratio < OVERHEAD_BUDGET else 'OVER BUDGET'}")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+    asyncio.run(run(args.requests))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Throughput of /paper_search against a local stand-in arXiv server.
+
+Usage: python -m benchmarks.bench_paper_search [--latency 0.2] [--requests 64]
+
+With a non-blocking arXiv fetch, throughput should scale with concurrency
+(roughly concurrency / latency) instead of staying flat at 1 / latency. The
+query cache and similarity re-ranking are off and every query is distinct,
+so each request measures one arXiv fetch.
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+ARXIV_PORT = 9001
+SEARCH_PORT = 9101
+
+def start_server(app: str, port: int, env: dict, workers: int = 1) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", app, "--port", str(port), "--log-level", "warning", "--workers", str(workers)],
+        env={**os.environ, **env},
+    )
+
+def wait_until_up(url: str, timeout: float = 15.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            httpx.get(url, timeout=1.0)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    raise RuntimeError(f"Server at {url} did not start in time.")
+
+async def run_level(url: str, concurrency: int, total: int) -> float:
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=60) as client:
+        slots = asyncio.Semaphore(concurrency)
+
+        async def one(i: int):
+            async with slots:
+                r = await client.post(url, json={"query": f"bench {concurrency} {i}", "max_results": 5})
+                r.raise_for_status()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(total)))
+        return total / (time.perf_counter() - start)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--requests", type=int, default=64)
+    parser.add_argument("--levels", default="1,2,4,8,16")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="scout-search-bench-")
+    arxiv = start_server("benchmarks.fake_arxiv:app", ARXIV_PORT, {"ARXIV_FAKE_LATENCY": str(args.latency)})
+    search = start_server(
+        "tools.paper_search_server:app",
+        SEARCH_PORT,
+        {
+            "ARXIV_API_URL": f"http://127.0.0.1:{ARXIV_PORT}/api/query",
+            "QUERY_CACHE_BACKEND": "none",
+            "SIMILARITY_RERANK": "false",
+            # Keep the index and similarity files out of the working tree.
+            "ARXIV_INDEX_PATH": os.path.join(workdir, "arxiv_index.sqlite3"),
+            "SIMILARITY_INDEX_DIR": os.path.join(workdir, "similarity"),
+        },
+    )
+    try:
+        wait_until_up(f"http://127.0.0.1:{ARXIV_PORT}/docs")
+        wait_until_up(f"http://127.0.0.1:{SEARCH_PORT}/docs")
+        url = f"http://127.0.0.1:{SEARCH_PORT}/paper_search"
+        print(f"{'concurrency':>12} {'req/s':>10}")
+        for level in [int(x) for x in args.levels.split(",")]:
+            throughput = asyncio.run(run_level(url, level, args.requests))
+            print(f"{level:>12} {throughput:>10.2f}")
+    finally:
+        search.terminate()
+        arxiv.terminate()
+
+if __name__ == "__main__":
+    main()
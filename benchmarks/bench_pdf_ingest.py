@@ -0,0 +1,103 @@
+"""Peak RSS and latency of PDF ingestion: fully buffered vs streaming with a text budget.
+
+Usage: python -m benchmarks.bench_pdf_ingest [--pages 200] [--padding 100000]
+
+"buffered" reproduces the original pipeline (whole body in memory, BytesIO,
+every page extracted in-process). "streaming" uses the summarize server's
+path: spooled download with a byte cap, then budgeted extraction in the
+worker pool. Each mode runs in a fresh interpreter so peak RSS is isolated.
+"""
+import argparse
+import asyncio
+import io
+import json
+import resource
+import subprocess
+import sys
+import time
+
+import httpx
+
+from benchmarks.bench_paper_search import start_server, wait_until_up
+
+PDF_HOST_PORT = 9002
+
+def peak_rss_mb(who: int) -> float:
+    # ru_maxrss is in KiB on Linux; for RUSAGE_CHILDREN it is the largest extraction worker.
+    return resource.getrusage(who).ru_maxrss / 1024
+
+def run_buffered(url: str) -> int:
+    from PyPDF2 import PdfReader
+
+    response = httpx.get(url, timeout=60)
+    reader = PdfReader(io.BytesIO(response.content))
+    text_content = ""
+    for page in reader.pages:
+        text_content += page.extract_text() or ""
+    return len(text_content[:8000])
+
+async def run_streaming(url: str, max_chars: int) -> int:
+    from config import PDF_MAX_DOWNLOAD_BYTES, PDF_SPOOL_THRESHOLD_BYTES, PDF_EXTRACT_WORKERS, PDF_EXTRACT_PAGES_PER_TASK
+    from utils.pdf_extract import PDFExtractionPool
+    from utils.pdf_spool import spool_response
+
+    pool = PDFExtractionPool(PDF_EXTRACT_WORKERS, 1, PDF_EXTRACT_PAGES_PER_TASK, 1)
+    pool.start()
+    try:
+        async with httpx.AsyncClient(timeout=60) as client:
+            async with client.stream("GET", url) as response:
+                pdf = await spool_response(response, PDF_MAX_DOWNLOAD_BYTES, PDF_SPOOL_THRESHOLD_BYTES)
+        try:
+            text, _ = await pool.extract(pdf.source, max_chars)
+        finally:
+            pdf.cleanup()
+        return len(text[:max_chars])
+    finally:
+        pool.close()
+
+def child(mode: str, url: str, max_chars: int):
+    start = time.perf_counter()
+    if mode == "buffered":
+        chars = run_buffered(url)
+    else:
+        chars = asyncio.run(run_streaming(url, max_chars))
+    latency = time.perf_counter() - start
+    print(json.dumps({"mode": mode, "latency_s": latency, "peak_rss_mb": peak_rss_mb(resource.RUSAGE_SELF),
+                      "worker_rss_mb": peak_rss_mb(resource.RUSAGE_CHILDREN), "chars": chars}))
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--padding", type=int, default=200_000, help="binary bytes per page")
+    parser.add_argument("--max-chars", type=int, default=8000)
+    parser.add_argument("--child", choices=["buffered", "streaming"])
+    parser.add_argument("--url")
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child, args.url, args.max_chars)
+        return
+
+    host = start_server("benchmarks.fake_pdf_host:app", PDF_HOST_PORT, {})
+    try:
+        wait_until_up(f"http://127.0.0.1:{PDF_HOST_PORT}/docs")
+        url = f"http://127.0.0.1:{PDF_HOST_PORT}/pdf/{args.pages}?padding={args.padding}"
+        # Warm the host's fixture cache without buffering the body: children inherit
+        # this process's peak RSS across fork/exec, which would mask their own.
+        with httpx.stream("GET", url, timeout=120) as response:
+            for _ in response.iter_bytes():
+                pass
+        print(f"{'mode':>10} {'latency s':>10} {'peak RSS MB':>12} {'worker RSS MB':>14}")
+        for mode in ("buffered", "streaming"):
+            out = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_pdf_ingest", "--child", mode, "--url", url,
+                 "--max-chars", str(args.max_chars)],
+                capture_output=True, text=True, check=True,
+            )
+            result = json.loads(out.stdout.strip().splitlines()[-1])
+            print(f"{mode:>10} {result['latency_s']:>10.3f} {result['peak_rss_mb']:>12.1f} {result['worker_rss_mb']:>14.1f}")
+    finally:
+        host.terminate()
+
+if __name__ == "__main__":
+    main()
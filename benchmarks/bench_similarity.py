@@ -0,0 +1,81 @@
+"""Micro-benchmark of the hashed TF-IDF similarity index.
+
+Usage: python -m benchmarks.bench_similarity [--papers 100000] [--batch 32] [--repeat 20]
+
+Builds an index of synthetic papers (Zipf-distributed vocabulary), saves it,
+reloads it memory-mapped, then times single and batched scoring against every
+stored paper, "more like this" lookups and re-ranking one search's candidates.
+"""
+import argparse
+import itertools
+import random
+import statistics
+import tempfile
+import time
+
+import numpy as np
+
+from utils.similarity import SimilarityIndex
+
+def make_papers(count: int, vocabulary: int, seed: int = 0):
+    rng = random.Random(seed)
+    words = [f"w{i}" for i in range(vocabulary)]
+    cum_weights = list(itertools.accumulate(1.0 / (rank + 1) for rank in range(vocabulary)))
+    papers = []
+    for i in range(count):
+        title = " ".join(rng.choices(words, cum_weights=cum_weights, k=10))
+        summary = " ".join(rng.choices(words, cum_weights=cum_weights, k=150))
+        papers.append({"title": title, "summary": summary, "pdf_url": f"http://example.org/pdf/{i}"})
+    return papers
+
+def median_ms(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--papers", type=int, default=100000)
+    parser.add_argument("--vocabulary", type=int, default=30000)
+    parser.add_argument("--dim", type=int, default=512)
+    parser.add_argument("--batch", type=int, default=32)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    papers = make_papers(args.papers, args.vocabulary)
+    directory = tempfile.mkdtemp(prefix="scout-similarity-")
+    index = SimilarityIndex(directory, args.dim, mmap_rows=0)
+    start = time.perf_counter()
+    for i in range(0, len(papers), 1000):
+        index.add(papers[i:i + 1000])
+    build_s = time.perf_counter() - start
+    index.save()
+
+    index = SimilarityIndex(directory, args.dim, mmap_rows=0)
+    start = time.perf_counter()
+    index.load()
+    load_ms = (time.perf_counter() - start) * 1000
+    print(f"{len(index)} papers x {args.dim} dims: built in {build_s:.1f}s "
+          f"({len(index) / build_s:.0f} papers/s), memory-mapped load {load_ms:.0f} ms")
+
+    rng = random.Random(1)
+    queries = [index.vectorize(p["title"]) for p in rng.sample(papers, args.batch)]
+    one = queries[0][None, :]
+    batch = np.stack(queries)
+    single_ms = median_ms(lambda: index.scores(one), args.repeat)
+    batch_ms = median_ms(lambda: index.scores(batch), args.repeat)
+    similar_ms = median_ms(lambda: index.similar(papers[7]["pdf_url"], 5, 0.9), args.repeat)
+    candidates = rng.sample(papers, 10)
+    rank_ms = median_ms(lambda: index.rank(candidates[0]["title"], candidates, 5, 0.9), args.repeat)
+
+    print(f"{'operation':>28} {'median ms':>10}")
+    print(f"{'score 1 query':>28} {single_ms:>10.1f}")
+    print(f"{f'score {args.batch} queries (batched)':>28} {batch_ms:>10.1f}   ({batch_ms / args.batch:.2f} ms/query)")
+    print(f"{'more like this (top 5)':>28} {similar_ms:>10.1f}")
+    print(f"{'re-rank 10 candidates':>28} {rank_ms:>10.2f}")
+
+if __name__ == "__main__":
+    main()
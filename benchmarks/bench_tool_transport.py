@@ -0,0 +1,97 @@
+"""Tool call tail latency under injected faults: a bare httpx call vs AsyncToolTransport.
+
+Usage: python -m benchmarks.bench_tool_transport [--calls 400] [--slow-rate 0.05] [--error-rate 0.03]
+
+"bare" is the agent's original call (new connection per call, one long
+timeout, no retries). "transport" adds keep-alive, a short per-attempt timeout
+and jittered retries; "hedged" also sends a second request once a call has
+been outstanding longer than the observed p90.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from typing import Awaitable, Callable, List, Tuple
+
+import httpx
+
+from benchmarks.bench_paper_search import start_server, wait_until_up
+from utils.tool_transport import AsyncToolTransport
+
+PORT = 9004
+PAYLOAD = {"query": "transport benchmark", "max_results": 5}
+
+def make_transport(url: str, attempt_timeout: float, hedge_quantile: float) -> AsyncToolTransport:
+    return AsyncToolTransport(
+        "bench", url, pool_size=16, deadline=60, attempt_timeout=attempt_timeout, max_retries=3,
+        backoff_base=0.05, backoff_max=0.5, hedge_quantile=hedge_quantile,
+        breaker_failures=1000, breaker_reset_seconds=30,
+    )
+
+async def run(call: Callable[[], Awaitable[httpx.Response]], calls: int, concurrency: int) -> Tuple[List[float], int]:
+    slots = asyncio.Semaphore(concurrency)
+
+    async def one() -> Tuple[float, bool]:
+        async with slots:
+            start = time.perf_counter()
+            try:
+                response = await call()
+                ok = response.is_success
+            except httpx.HTTPError:
+                ok = False
+            return time.perf_counter() - start, ok
+
+    results = await asyncio.gather(*(one() for _ in range(calls)))
+    return sorted(latency for latency, _ in results), sum(1 for _, ok in results if not ok)
+
+def quantile(values: List[float], q: float) -> float:
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+async def compare(base_url: str, args: argparse.Namespace):
+    # No keep-alive, like the original one-off requests.post.
+    bare = httpx.AsyncClient(base_url=base_url, limits=httpx.Limits(max_keepalive_connections=0), timeout=60)
+    transport = make_transport(base_url, args.attempt_timeout, 0)
+    hedged = make_transport(base_url, args.attempt_timeout, 0.9)
+    await transport.start()
+    await hedged.start()
+    variants = {
+        "bare": lambda: bare.post("/paper_search", json=PAYLOAD),
+        "transport": lambda: transport.post("/paper_search", PAYLOAD),
+        "hedged": lambda: hedged.post("/paper_search", PAYLOAD),
+    }
+    try:
+        print(f"faults: {args.slow_rate:.0%} stall {args.slow_seconds}s, {args.error_rate:.0%} fail with 503")
+        print(f"{'variant':>10} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8} {'failed':>7}")
+        for name, call in variants.items():
+            latencies, failed = await run(call, args.calls, args.concurrency)
+            print(f"{name:>10} {statistics.median(latencies) * 1000:>8.0f} {quantile(latencies, 0.95) * 1000:>8.0f} "
+                  f"{quantile(latencies, 0.99) * 1000:>8.0f} {latencies[-1] * 1000:>8.0f} {failed:>7}")
+    finally:
+        await bare.aclose()
+        await transport.aclose()
+        await hedged.aclose()
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--slow-rate", type=float, default=0.05)
+    parser.add_argument("--slow-seconds", type=float, default=3.0)
+    parser.add_argument("--error-rate", type=float, default=0.03)
+    parser.add_argument("--attempt-timeout", type=float, default=0.5)
+    args = parser.parse_args()
+
+    server = start_server("benchmarks.fake_flaky_tool:app", PORT, {
+        "FAULT_SLOW_RATE": str(args.slow_rate),
+        "FAULT_SLOW_SECONDS": str(args.slow_seconds),
+        "FAULT_ERROR_RATE": str(args.error_rate),
+    })
+    base_url = f"http://127.0.0.1:{PORT}"
+    try:
+        wait_until_up(f"{base_url}/docs")
+        asyncio.run(compare(base_url, args))
+    finally:
+        server.terminate()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Local stand-in for export.arxiv.org used by the benchmarks.
+
+Run with: ARXIV_FAKE_LATENCY=0.2 uvicorn benchmarks.fake_arxiv:app --port 9001
+
+Serves synthetic feeds by default. With ARXIV_FAKE_FIXTURES pointing at a
+directory of recorded responses, it replays those instead (picked by query).
+Record some with:
+
+    python -m benchmarks.fake_arxiv record "large language models" --max 50
+"""
+import argparse
+import asyncio
+import glob
+import hashlib
+import os
+
+from fastapi import FastAPI, Query
+from fastapi.responses import Response
+
+from benchmarks.fixtures import make_atom_feed
+
+LATENCY = float(os.getenv("ARXIV_FAKE_LATENCY", "0.2"))
+FIXTURES_DIR = os.getenv("ARXIV_FAKE_FIXTURES", "")
+
+app = FastAPI()
+
+_feeds = {}
+
+def _load_recorded(directory: str):
+    recorded = []
+    for path in sorted(glob.glob(os.path.join(directory, "*.xml"))):
+        with open(path, "rb") as f:
+            recorded.append(f.read())
+    return recorded
+
+_recorded = _load_recorded(FIXTURES_DIR) if FIXTURES_DIR else []
+
+@app.get("/api/query")
+async def query(max_results: int = Query(5), search_query: str = Query("")):
+    if _recorded:
+        # Stable choice per query, so repeated queries replay the same response.
+        digest = hashlib.sha256(search_query.encode("utf-8")).digest()
+        feed = _recorded[int.from_bytes(digest[:4], "big") % len(_recorded)]
+    else:
+        feed = _feeds.get(max_results)
+        if feed is None:
+            feed = _feeds[max_results] = make_atom_feed(max_results)
+    await asyncio.sleep(LATENCY)
+    return Response(content=feed, media_type="application/atom+xml")
+
+def record(query_text: str, max_results: int, out_dir: str, api_url: str) -> str:
+    import httpx
+
+    from utils.arxiv_feed import search_params
+
+    response = httpx.get(api_url, params=search_params(query_text, max_results), timeout=60)
+    response.raise_for_status()
+    os.makedirs(out_dir, exist_ok=True)
+    name = "_".join(query_text.lower().split())[:60] or "query"
+    path = os.path.join(out_dir, f"{name}_{max_results}.xml")
+    with open(path, "wb") as f:
+        f.write(response.content)
+    return path
+
+def main():
+    parser = argparse.ArgumentParser(description="Record arXiv API responses for replay.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    record_cmd = commands.add_parser("record")
+    record_cmd.add_argument("query")
+    record_cmd.add_argument("--max", type=int, default=50)
+    record_cmd.add_argument("--out", default=".cache/arxiv_fixtures")
+    record_cmd.add_argument("--api-url", default="http://export.arxiv.org/api/query")
+    args = parser.parse_args()
+    print(f"Recorded {record(args.query, args.max, args.out, args.api_url)}")
+
+if __name__ == "__main__":
+    main()
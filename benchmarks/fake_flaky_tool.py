@@ -0,0 +1,33 @@
+"""Tool server stand-in with injected faults, for the transport benchmark.
+
+Run with: FAULT_SLOW_RATE=0.05 FAULT_ERROR_RATE=0.03 uvicorn benchmarks.fake_flaky_tool:app --port 9004
+
+POST /paper_search answers after FAULT_BASE_LATENCY seconds; a FAULT_SLOW_RATE
+share of requests stalls for FAULT_SLOW_SECONDS first, and a FAULT_ERROR_RATE
+share fails with 503.
+"""
+import asyncio
+import os
+import random
+
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+
+BASE_LATENCY = float(os.getenv("FAULT_BASE_LATENCY", "0.02"))
+SLOW_RATE = float(os.getenv("FAULT_SLOW_RATE", "0.05"))
+SLOW_SECONDS = float(os.getenv("FAULT_SLOW_SECONDS", "3"))
+ERROR_RATE = float(os.getenv("FAULT_ERROR_RATE", "0.03"))
+
+app = FastAPI()
+
+_rng = random.Random(int(os.getenv("FAULT_SEED", "7")))
+
+@app.post("/paper_search")
+async def paper_search():
+    roll = _rng.random()
+    if roll < ERROR_RATE:
+        return JSONResponse({"detail": "injected failure"}, status_code=503)
+    if roll < ERROR_RATE + SLOW_RATE:
+        await asyncio.sleep(SLOW_SECONDS)
+    await asyncio.sleep(BASE_LATENCY)
+    return {"status": "success", "papers": [], "source": "fake"}
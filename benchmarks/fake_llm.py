@@ -0,0 +1,60 @@
+"""Local OpenAI-compatible chat completions endpoint that streams canned text.
+
+Run with: LLM_FAKE_TOKENS_PER_SECOND=200 uvicorn benchmarks.fake_llm:app --port 9003
+and point clients at it with OPENAI_BASE_URL=http://127.0.0.1:9003/v1.
+
+When a request offers tools and ends with a user message, the reply is a
+paper_search tool call for that message (disable with LLM_FAKE_TOOL_CALLS=0),
+so agent turns exercise the tool round-trip too.
+"""
+import asyncio
+import json
+import os
+import time
+
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+
+TOKENS_PER_SECOND = float(os.getenv("LLM_FAKE_TOKENS_PER_SECOND", "200"))
+TTFT = float(os.getenv("LLM_FAKE_TTFT", "0.3"))
+OUTPUT_TOKENS = int(os.getenv("LLM_FAKE_OUTPUT_TOKENS", "150"))
+TOOL_CALLS = os.getenv("LLM_FAKE_TOOL_CALLS", "1") == "1"
+
+app = FastAPI()
+
+def _chunk(model: str, delta: dict, finish_reason=None) -> str:
+    body = {
+        "id": "chatcmpl-fake",
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+    }
+    return f"data: {json.dumps(body)}\n\n"
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    model = body.get("model", "fake")
+    messages = body.get("messages") or [{}]
+    call_tool = TOOL_CALLS and body.get("tools") and messages[-1].get("role") == "user"
+
+    async def stream():
+        await asyncio.sleep(TTFT)
+        yield _chunk(model, {"role": "assistant", "content": ""})
+        if call_tool:
+            arguments = json.dumps({"query": messages[-1].get("content") or "", "max_results": 5})
+            yield _chunk(model, {"tool_calls": [{
+                "index": 0, "id": "call_fake", "type": "function",
+                "function": {"name": "paper_search", "arguments": arguments},
+            }]})
+            yield _chunk(model, {}, "tool_calls")
+            yield "data: [DONE]\n\n"
+            return
+        for i in range(OUTPUT_TOKENS):
+            yield _chunk(model, {"content": f"tok{i} "})
+            await asyncio.sleep(1 / TOKENS_PER_SECOND)
+        yield _chunk(model, {}, "stop")
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(stream(), media_type="text/event-stream")
@@ -0,0 +1,33 @@
+"""Local PDF host serving synthetic papers of configurable size.
+
+GET /pdf/<pages>?padding=<bytes per page> returns a deterministic PDF with an
+ETag, and answers conditional requests with 304.
+
+Run with: uvicorn benchmarks.fake_pdf_host:app --port 9002
+"""
+import asyncio
+import hashlib
+import os
+
+from fastapi import FastAPI, Request
+from fastapi.responses import Response
+
+from benchmarks.fixtures import make_pdf
+
+LATENCY = float(os.getenv("PDF_FAKE_LATENCY", "0"))
+
+app = FastAPI()
+
+_pdfs = {}
+
+@app.get("/pdf/{pages}")
+async def pdf(pages: int, request: Request, padding: int = 0):
+    key = (pages, padding)
+    if key not in _pdfs:
+        data = make_pdf(pages, padding_per_page=padding)
+        _pdfs[key] = (data, '"%s"' % hashlib.sha256(data).hexdigest()[:16])
+    data, etag = _pdfs[key]
+    await asyncio.sleep(LATENCY)
+    if request.headers.get("If-None-Match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    return Response(content=data, media_type="application/pdf", headers={"ETag": etag})
@@ -0,0 +1,73 @@
+from xml.sax.saxutils import escape
+
+ATOM_HEADER = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<feed xmlns="http://www.w3.org/2005/Atom" '
+    'xmlns:arxiv="http://arxiv.org/schemas/atom">\n'
+    '  <title type="html">ArXiv Query: search_query=all:benchmark</title>\n'
+)
+
+def make_atom_entry(i: int) -> str:
+    arxiv_id = f"2501.{i:05d}v1"
+    authors = "".join(
+        f"    <author><name>Author {i}-{j}</name></author>\n" for j in range(3)
+    )
+    return (
+        "  <entry>\n"
+        f"    <id>http://arxiv.org/abs/{arxiv_id}</id>\n"
+        f"    <published>2025-01-{(i % 28) + 1:02d}T12:00:00Z</published>\n"
+        f"    <updated>2025-01-{(i % 28) + 1:02d}T12:00:00Z</updated>\n"
+        f"    <title>{escape(f'Synthetic paper {i} on scalable benchmark methods')}</title>\n"
+        f"    <summary>{escape(f'We study benchmark topic {i}. ' * 20)}</summary>\n"
+        f"{authors}"
+        f'    <link href="http://arxiv.org/abs/{arxiv_id}" rel="alternate" type="text/html"/>\n'
+        f'    <link title="pdf" href="http://arxiv.org/pdf/{arxiv_id}" rel="related" type="application/pdf"/>\n'
+        "  </entry>\n"
+    )
+
+def make_atom_feed(num_entries: int) -> bytes:
+    """Builds an arXiv-shaped Atom feed with `num_entries` synthetic papers."""
+    body = "".join(make_atom_entry(i) for i in range(num_entries))
+    return (ATOM_HEADER + body + "</feed>\n").encode("utf-8")
+
+def make_pdf(num_pages: int, lines_per_page: int = 40, padding_per_page: int = 0) -> bytes:
+    """Builds a minimal text PDF with `num_pages` pages of synthetic paper text.
+
+    `padding_per_page` adds an unreferenced binary stream per page so file sizes
+    resemble real papers with figures.
+    """
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # page tree, filled in once the page object numbers are known
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    page_ids = []
+    for p in range(num_pages):
+        lines = [f"Section {p + 1}. Synthetic scientific text line {i} for benchmarking extraction." for i in range(lines_per_page)]
+        ops = ["BT", "/F1 10 Tf", "14 TL", "50 780 Td"]
+        ops += [f"({line}) Tj T*" for line in lines]
+        ops.append("ET")
+        stream = "\n".join(ops).encode("latin-1")
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        content_id = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_id
+        )
+        page_ids.append(len(objects))
+        if padding_per_page:
+            padding = (bytes(range(p % 251, 251)) + bytes(range(251)) * (padding_per_page // 251 + 1))[:padding_per_page]
+            objects.append(b"<< /Length %d >>\nstream\n" % len(padding) + padding + b"\nendstream")
+    kids = " ".join(f"{i} 0 R" for i in page_ids).encode("ascii")
+    objects[1] = b"<< /Type /Pages /Kids [" + kids + b"] /Count %d >>" % num_pages
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref_offset = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref_offset)
+    return bytes(out)
@@ -0,0 +1,280 @@
+"""Offline load test of the tool servers against local stand-ins for arXiv, PDF hosts and the LLM.
+
+Usage:
+    python -m benchmarks.loadgen [--scenarios search,summarize,batch,stream] [--concurrency 8] [--requests 200]
+    python -m benchmarks.loadgen --save-baseline      # record this machine's baseline
+    python -m benchmarks.loadgen --compare            # exit 1 if a scenario regressed
+
+Every run starts the fakes and fresh tool servers (with empty caches in a temp
+directory) and reports throughput, p50/p95/p99 latency, errors and the peak
+RSS of each server's process tree, including extraction workers. Regressions
+are throughput drops or p95 / peak RSS increases beyond --tolerance relative
+to the baseline, or more errors.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from typing import Callable, Dict, List
+
+import httpx
+
+from benchmarks.bench_paper_search import start_server, wait_until_up
+
+ARXIV_PORT = 9201
+PDF_HOST_PORT = 9202
+LLM_PORT = 9203
+SEARCH_PORT = 9211
+SUMMARIZE_PORT = 9212
+
+DEFAULT_BASELINE = ".cache/benchmarks/loadgen_baseline.json"
+
+# (pages, padding bytes per page): short note, typical paper, long paper with figures
+PDF_SIZES = [(4, 0), (20, 50_000), (120, 200_000)]
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(q * (len(sorted_values) - 1)))))
+    return sorted_values[index]
+
+def _tree_rss_bytes(pid: int) -> int:
+    """RSS of a process and all its descendants, from /proc (Linux)."""
+    children: Dict[int, List[int]] = {}
+    rss: Dict[int, int] = {}
+    page_size = os.sysconf("SC_PAGE_SIZE")
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                # Fields after the parenthesized command name: state, ppid, ...; rss is field 24.
+                fields = f.read().rsplit(")", 1)[1].split()
+        except (FileNotFoundError, ProcessLookupError, PermissionError):
+            continue
+        children.setdefault(int(fields[1]), []).append(int(entry))
+        rss[int(entry)] = int(fields[21]) * page_size
+    total = 0
+    pending = [pid]
+    while pending:
+        current = pending.pop()
+        total += rss.get(current, 0)
+        pending.extend(children.get(current, ()))
+    return total
+
+class PeakRSSSampler:
+    """Polls a process tree's RSS in a background thread and keeps the maximum."""
+
+    def __init__(self, pid: int, interval: float = 0.05):
+        self.pid = pid
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, _tree_rss_bytes(self.pid))
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+
+async def drive(
+    url: str, make_payload: Callable[[int], dict], concurrency: int, total: int, timeout: float, stream: bool = False
+) -> Dict:
+    """Closed-loop load: `concurrency` clients issue `total` POSTs between them.
+
+    With `stream`, responses are read incrementally and the time to the first
+    body line is reported too (what a user watching the output waits for).
+    """
+    latencies: List[float] = []
+    first_lines: List[float] = []
+    errors = 0
+    next_index = 0
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=timeout) as client:
+
+        async def worker():
+            nonlocal errors, next_index
+            while next_index < total:
+                i = next_index
+                next_index += 1
+                start = time.perf_counter()
+                first_line_at = None
+                try:
+                    async with client.stream("POST", url, json=make_payload(i)) as response:
+                        if response.status_code >= 400:
+                            errors += 1
+                            continue
+                        async for line in response.aiter_lines():
+                            if first_line_at is None and line:
+                                first_line_at = time.perf_counter()
+                except httpx.HTTPError:
+                    errors += 1
+                    continue
+                latencies.append(time.perf_counter() - start)
+                if stream and first_line_at is not None:
+                    first_lines.append(first_line_at - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    result = {
+        "requests": total,
+        "errors": errors,
+        "throughput_rps": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+    }
+    if stream:
+        first_lines.sort()
+        result["first_line_p50_ms"] = percentile(first_lines, 0.50) * 1000
+        result["first_line_p95_ms"] = percentile(first_lines, 0.95) * 1000
+    return result
+
+def search_payloads(distinct_queries: int, seed: int) -> Callable[[int], dict]:
+    rng = random.Random(seed)
+    # Repeats across the run exercise the query cache the way real traffic does.
+    queries = [f"benchmark topic {rng.randrange(distinct_queries)}" for _ in range(100_000)]
+    return lambda i: {"query": queries[i % len(queries)], "max_results": 5}
+
+def summarize_payloads(distinct_pdfs: int, seed: int) -> Callable[[int], dict]:
+    rng = random.Random(seed)
+    urls = []
+    for _ in range(100_000):
+        pages, padding = PDF_SIZES[rng.randrange(len(PDF_SIZES))]
+        urls.append(f"http://127.0.0.1:{PDF_HOST_PORT}/pdf/{pages}?padding={padding}&v={rng.randrange(distinct_pdfs)}")
+    return lambda i: {"pdf_url": urls[i % len(urls)]}
+
+def batch_payloads(distinct_pdfs: int, seed: int, batch_size: int = 5) -> Callable[[int], dict]:
+    single = summarize_payloads(distinct_pdfs, seed)
+    return lambda i: {"pdf_urls": [single(i * batch_size + j)["pdf_url"] for j in range(batch_size)]}
+
+def run_scenario(name: str, args, env: Dict[str, str]) -> Dict:
+    if name == "search":
+        app, port, path = "tools.paper_search_server:app", SEARCH_PORT, "/paper_search"
+        make_payload = search_payloads(args.distinct, args.seed)
+    elif name == "batch":
+        # Five papers per request; latency is until the last NDJSON line arrives.
+        app, port, path = "tools.pdf_summarize_server:app", SUMMARIZE_PORT, "/pdf_summarize_batch"
+        make_payload = batch_payloads(args.distinct, args.seed)
+    elif name == "stream":
+        # Streamed summaries (SSE); also reports the time to the first event.
+        app, port, path = "tools.pdf_summarize_server:app", SUMMARIZE_PORT, "/pdf_summarize"
+        single = summarize_payloads(args.distinct, args.seed)
+        make_payload = lambda i: {**single(i), "stream": True}
+    else:
+        app, port, path = "tools.pdf_summarize_server:app", SUMMARIZE_PORT, "/pdf_summarize"
+        make_payload = summarize_payloads(args.distinct, args.seed)
+
+    server = start_server(app, port, env)
+    try:
+        wait_until_up(f"http://127.0.0.1:{port}/docs", timeout=30)
+        with PeakRSSSampler(server.pid) as sampler:
+            result = asyncio.run(drive(f"http://127.0.0.1:{port}{path}", make_payload,
+                                       args.concurrency, args.requests, args.timeout, stream=name == "stream"))
+        result["peak_rss_mb"] = sampler.peak / (1024 * 1024)
+        return result
+    finally:
+        server.terminate()
+        server.wait()
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict], tolerance: float) -> List[str]:
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if result["throughput_rps"] < base["throughput_rps"] * (1 - tolerance):
+            regressions.append(f"{name}: throughput {result['throughput_rps']:.1f} < baseline {base['throughput_rps']:.1f} req/s")
+        if result["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {result['p95_ms']:.0f} > baseline {base['p95_ms']:.0f} ms")
+        if result["peak_rss_mb"] > base["peak_rss_mb"] * (1 + tolerance):
+            regressions.append(f"{name}: peak RSS {result['peak_rss_mb']:.0f} > baseline {base['peak_rss_mb']:.0f} MB")
+        if result["errors"] > base["errors"]:
+            regressions.append(f"{name}: {result['errors']} errors (baseline {base['errors']})")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scenarios", default="search,summarize")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--distinct", type=int, default=20, help="distinct queries / PDFs in the request mix")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--arxiv-latency", type=float, default=0.2)
+    parser.add_argument("--llm-ttft", type=float, default=0.3)
+    parser.add_argument("--llm-tokens-per-second", type=float, default=200)
+    parser.add_argument("--save-baseline", nargs="?", const=DEFAULT_BASELINE)
+    parser.add_argument("--compare", nargs="?", const=DEFAULT_BASELINE)
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="scout-loadgen-")
+    env = {
+        "ARXIV_API_URL": f"http://127.0.0.1:{ARXIV_PORT}/api/query",
+        "OPENAI_BASE_URL": f"http://127.0.0.1:{LLM_PORT}/v1",
+        "OPENAI_API_KEY": os.environ.get("OPENAI_API_KEY", "offline-benchmark"),
+        "LLM_PROVIDER": "openai",
+        "ARXIV_INDEX_PATH": os.path.join(workdir, "arxiv_index.sqlite3"),
+        "QUERY_CACHE_PATH": os.path.join(workdir, "query_cache.sqlite3"),
+        "PDF_CACHE_DIR": os.path.join(workdir, "pdf_text"),
+        "SIMILARITY_INDEX_DIR": os.path.join(workdir, "similarity"),
+    }
+    fakes = [
+        start_server("benchmarks.fake_arxiv:app", ARXIV_PORT, {"ARXIV_FAKE_LATENCY": str(args.arxiv_latency)}),
+        start_server("benchmarks.fake_pdf_host:app", PDF_HOST_PORT, {}),
+        start_server("benchmarks.fake_llm:app", LLM_PORT, {
+            "LLM_FAKE_TTFT": str(args.llm_ttft),
+            "LLM_FAKE_TOKENS_PER_SECOND": str(args.llm_tokens_per_second),
+        }),
+    ]
+    results: Dict[str, Dict] = {}
+    try:
+        for port in (ARXIV_PORT, PDF_HOST_PORT, LLM_PORT):
+            wait_until_up(f"http://127.0.0.1:{port}/docs")
+        print(f"{'scenario':>10} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7} {'peak RSS MB':>12}")
+        for name in args.scenarios.split(","):
+            result = results[name] = run_scenario(name, args, env)
+            print(f"{name:>10} {result['throughput_rps']:>8.1f} {result['p50_ms']:>8.0f} {result['p95_ms']:>8.0f} "
+                  f"{result['p99_ms']:>8.0f} {result['errors']:>7} {result['peak_rss_mb']:>12.1f}")
+            if "first_line_p50_ms" in result:
+                print(f"{'':>10} first event p50 {result['first_line_p50_ms']:.0f} ms, p95 {result['first_line_p95_ms']:.0f} ms")
+    finally:
+        for fake in fakes:
+            fake.terminate()
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.save_baseline) or ".", exist_ok=True)
+        with open(args.save_baseline, "w") as f:
+            json.dump({"settings": {k: v for k, v in vars(args).items() if k not in ("save_baseline", "compare")},
+                       "results": results}, f, indent=2)
+        print(f"Baseline saved to {args.save_baseline}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions against {args.compare} (tolerance {args.tolerance:.0%})")
+
+if __name__ == "__main__":
+    main()
@@ -8,6 +8,13 @@ load_dotenv()
 LLM_PROVIDER = os.getenv("LLM_PROVIDER", "openai")
 LLM_MODEL = os.getenv("LLM_MODEL", "gpt-4o")
 
+# Async LLM client used by the tool servers: shared connection pool plus a limiter
+# on in-flight requests and estimated tokens per minute (0 disables the token limit)
+LLM_MAX_CONCURRENT_REQUESTS = int(os.getenv("LLM_MAX_CONCURRENT_REQUESTS", "8"))
+LLM_TOKENS_PER_MINUTE = int(os.getenv("LLM_TOKENS_PER_MINUTE", "0"))
+LLM_HTTP_MAX_CONNECTIONS = int(os.getenv("LLM_HTTP_MAX_CONNECTIONS", "20"))
+LLM_MAX_OUTPUT_TOKENS = int(os.getenv("LLM_MAX_OUTPUT_TOKENS", "1024"))
+
 # API Keys
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 ANTHROPIC_API_KEY = os.getenv("ANTHROPIC_API_KEY")
@@ -17,6 +24,126 @@ GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
 PAPER_SEARCH_SERVER_URL = os.getenv("PAPER_SEARCH_SERVER_URL", "http://127.0.0.1:8001")
 PDF_SUMMARIZE_SERVER_URL = os.getenv("PDF_SUMMARIZE_SERVER_URL", "http://127.0.0.1:8002")
 
+# Chat history sent to the LLM: older tool outputs are elided and old turns summarized
+# once the history exceeds HISTORY_MAX_TOKENS; the most recent turns are always kept verbatim.
+HISTORY_MAX_TOKENS = int(os.getenv("HISTORY_MAX_TOKENS", "12000"))
+HISTORY_KEEP_RECENT_TURNS = int(os.getenv("HISTORY_KEEP_RECENT_TURNS", "3"))
+
+# Parallel tool execution per agent turn (all tool calls of one assistant turn run concurrently)
+TOOL_MAX_PARALLEL = int(os.getenv("TOOL_MAX_PARALLEL", "8"))
+TOOL_CONCURRENCY_LIMITS = {
+    "paper_search": int(os.getenv("PAPER_SEARCH_MAX_CONCURRENCY", "4")),
+    "pdf_summarize": int(os.getenv("PDF_SUMMARIZE_MAX_CONCURRENCY", "4")),
+}
+
+# Transport from the agent to the tool servers: an overall deadline per call (also sent to
+# the server), a timeout per attempt, jittered retries, optional hedging (a second request
+# once one has been outstanding longer than this latency quantile, e.g. 0.95; 0 disables)
+# and a circuit breaker that fails fast after repeated failures.
+TOOL_DEADLINE_SECONDS = {
+    "paper_search": float(os.getenv("PAPER_SEARCH_DEADLINE_SECONDS", "60")),
+    "pdf_summarize": float(os.getenv("PDF_SUMMARIZE_DEADLINE_SECONDS", "120")),
+}
+TOOL_ATTEMPT_TIMEOUT_SECONDS = {
+    "paper_search": float(os.getenv("PAPER_SEARCH_ATTEMPT_TIMEOUT_SECONDS", "20")),
+    "pdf_summarize": float(os.getenv("PDF_SUMMARIZE_ATTEMPT_TIMEOUT_SECONDS", "120")),
+}
+TOOL_MAX_RETRIES = int(os.getenv("TOOL_MAX_RETRIES", "2"))
+TOOL_RETRY_BACKOFF_BASE = float(os.getenv("TOOL_RETRY_BACKOFF_BASE", "0.25"))
+TOOL_RETRY_BACKOFF_MAX = float(os.getenv("TOOL_RETRY_BACKOFF_MAX", "5"))
+TOOL_HEDGE_QUANTILE = float(os.getenv("TOOL_HEDGE_QUANTILE", "0"))
+TOOL_BREAKER_FAILURES = int(os.getenv("TOOL_BREAKER_FAILURES", "5"))
+TOOL_BREAKER_RESET_SECONDS = float(os.getenv("TOOL_BREAKER_RESET_SECONDS", "30"))
+
+# Observability: every server exposes Prometheus-style metrics at GET /metrics; the stdout
+# banner per tool call (printed by the agent server) is optional.
+TOOL_CALL_LOGGING = os.getenv("TOOL_CALL_LOGGING", "true").lower() in ("1", "true", "yes")
+
+# Agent server (agent_server.py); the command line chat in main.py is a client of it.
+AGENT_SERVER_URL = os.getenv("AGENT_SERVER_URL", "http://127.0.0.1:8000")
+# Session histories: "memory" (per process, so run a single worker) or "sqlite" (a local
+# file shared by all uvicorn workers). Sessions idle for SESSION_IDLE_SECONDS are evicted.
+SESSION_BACKEND = os.getenv("SESSION_BACKEND", "memory")
+SESSION_PATH = os.getenv("SESSION_PATH", ".cache/sessions.sqlite3")
+SESSION_IDLE_SECONDS = float(os.getenv("SESSION_IDLE_SECONDS", "3600"))
+SESSION_MAX_ENTRIES = int(os.getenv("SESSION_MAX_ENTRIES", "10000"))
+# Keep-alive connections from the agent server to each tool server, shared by all sessions
+AGENT_TOOL_CONNECTIONS = int(os.getenv("AGENT_TOOL_CONNECTIONS", "100"))
+# Tool-calling rounds per user turn before the assistant must answer with what it has
+AGENT_MAX_TOOL_ROUNDS = int(os.getenv("AGENT_MAX_TOOL_ROUNDS", "1"))
+
+# arXiv API (override to point at a local stand-in for benchmarks)
+ARXIV_API_URL = os.getenv("ARXIV_API_URL", "http://export.arxiv.org/api/query")
+ARXIV_TIMEOUT = float(os.getenv("ARXIV_TIMEOUT", "10"))
+
+# Local arXiv metadata index. SEARCH_MODE is one of:
+#   live        - always query the arXiv API (results are still added to the index)
+#   index       - answer only from the local index
+#   index_first - use the index, falling back to arXiv when fewer than max_results papers match every term
+SEARCH_MODE = os.getenv("SEARCH_MODE", "live")
+ARXIV_INDEX_PATH = os.getenv("ARXIV_INDEX_PATH", ".cache/arxiv_index.sqlite3")
+
+# Hashed TF-IDF similarity index over indexed titles and abstracts (needs numpy). With
+# SIMILARITY_RERANK, paper_search fetches SIMILARITY_CANDIDATE_FACTOR x max_results
+# candidates, orders them by similarity to the query and drops near-duplicates (cosine
+# at or above SIMILARITY_DUPLICATE_THRESHOLD). Saved indexes with at least
+# SIMILARITY_MMAP_ROWS papers are memory-mapped rather than loaded.
+SIMILARITY_RERANK = os.getenv("SIMILARITY_RERANK", "true").lower() in ("1", "true", "yes")
+SIMILARITY_INDEX_DIR = os.getenv("SIMILARITY_INDEX_DIR", ".cache/similarity")
+SIMILARITY_DIM = int(os.getenv("SIMILARITY_DIM", "512"))
+SIMILARITY_MMAP_ROWS = int(os.getenv("SIMILARITY_MMAP_ROWS", "50000"))
+SIMILARITY_CANDIDATE_FACTOR = int(os.getenv("SIMILARITY_CANDIDATE_FACTOR", "2"))
+SIMILARITY_DUPLICATE_THRESHOLD = float(os.getenv("SIMILARITY_DUPLICATE_THRESHOLD", "0.9"))
+
+# Search result cache in front of the arXiv API: "memory" (per process), "sqlite"
+# (a local file shared by all uvicorn workers) or "none"
+QUERY_CACHE_BACKEND = os.getenv("QUERY_CACHE_BACKEND", "memory")
+QUERY_CACHE_PATH = os.getenv("QUERY_CACHE_PATH", ".cache/query_cache.sqlite3")
+QUERY_CACHE_TTL_SECONDS = float(os.getenv("QUERY_CACHE_TTL_SECONDS", "600"))
+QUERY_CACHE_MAX_ENTRIES = int(os.getenv("QUERY_CACHE_MAX_ENTRIES", "1024"))
+
+# Shared async HTTP connection pool used by the tool servers
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "20"))
+HTTP_MAX_CONNECTIONS_PER_HOST = int(os.getenv("HTTP_MAX_CONNECTIONS_PER_HOST", "10"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+
+# PDF download and extracted-text cache
+PDF_DOWNLOAD_TIMEOUT = float(os.getenv("PDF_DOWNLOAD_TIMEOUT", "30"))
+PDF_MAX_DOWNLOAD_BYTES = int(os.getenv("PDF_MAX_DOWNLOAD_BYTES", str(50 * 1024 * 1024)))
+PDF_SPOOL_THRESHOLD_BYTES = int(os.getenv("PDF_SPOOL_THRESHOLD_BYTES", str(4 * 1024 * 1024)))
+PDF_CACHE_DIR = os.getenv("PDF_CACHE_DIR", ".cache/pdf_text")
+PDF_CACHE_MAX_BYTES = int(os.getenv("PDF_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+PDF_CACHE_FRESH_SECONDS = float(os.getenv("PDF_CACHE_FRESH_SECONDS", "86400"))
+
+# PDF text extraction worker pool
+PDF_EXTRACT_WORKERS = int(os.getenv("PDF_EXTRACT_WORKERS", str(os.cpu_count() or 1)))
+PDF_EXTRACT_QUEUE_DEPTH = int(os.getenv("PDF_EXTRACT_QUEUE_DEPTH", "16"))
+PDF_EXTRACT_PAGES_PER_TASK = int(os.getenv("PDF_EXTRACT_PAGES_PER_TASK", "8"))
+PDF_EXTRACT_RETRY_AFTER = int(os.getenv("PDF_EXTRACT_RETRY_AFTER", "5"))
+
+# LLM summary memoization
+SUMMARY_TEXT_BUDGET = int(os.getenv("SUMMARY_TEXT_BUDGET", "8000"))
+SUMMARY_CHUNK_TOKENS = int(os.getenv("SUMMARY_CHUNK_TOKENS", "3000"))
+SUMMARY_MAP_CONCURRENCY = int(os.getenv("SUMMARY_MAP_CONCURRENCY", "4"))
+SUMMARY_CACHE_MAX_ENTRIES = int(os.getenv("SUMMARY_CACHE_MAX_ENTRIES", "1024"))
+SUMMARY_CACHE_TTL_SECONDS = float(os.getenv("SUMMARY_CACHE_TTL_SECONDS", "86400"))
+
+# The agent streams a single requested summary to the terminal as the LLM writes it
+PDF_SUMMARY_STREAMING = os.getenv("PDF_SUMMARY_STREAMING", "true").lower() in ("1", "true", "yes")
+
+# /pdf_summarize_batch: papers summarized at once per batch, and the largest batch accepted
+PDF_BATCH_MAX_CONCURRENCY = int(os.getenv("PDF_BATCH_MAX_CONCURRENCY", "4"))
+PDF_BATCH_MAX_URLS = int(os.getenv("PDF_BATCH_MAX_URLS", "20"))
+
+# Speculative prefetch: after a search the agent asks the PDF server to fetch and extract the top K
+# papers in the background (0 turns it off). The server runs at most PDF_PREFETCH_CONCURRENCY
+# prefetches (0 disables them), only while no foreground request is loading a PDF.
+PDF_PREFETCH_TOP_K = int(os.getenv("PDF_PREFETCH_TOP_K", "0"))
+PDF_PREFETCH_CONCURRENCY = int(os.getenv("PDF_PREFETCH_CONCURRENCY", "1"))
+PDF_PREFETCH_PER_MINUTE = float(os.getenv("PDF_PREFETCH_PER_MINUTE", "30"))
+PDF_PREFETCH_MAX_PENDING = int(os.getenv("PDF_PREFETCH_MAX_PENDING", "16"))
+
 # Tool Definitions (for LLM function calling)
 TOOLS_DEFINITIONS = [
     {
@@ -41,6 +168,28 @@ TOOLS_DEFINITIONS = [
             }
         }
     },
+    {
+        "type": "function",
+        "function": {
+            "name": "similar_papers",
+            "description": "Finds papers similar to one already returned by paper_search (\"more like this\"), from the local index.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "pdf_url": {
+                        "type": "string",
+                        "description": "The PDF URL of the paper to find similar papers for."
+                    },
+                    "max_results": {
+                        "type": "integer",
+                        "description": "The maximum number of papers to retrieve.",
+                        "default": 5
+                    }
+                },
+                "required": ["pdf_url"]
+            }
+        }
+    },
     {
         "type": "function",
         "function": {
@@ -52,6 +201,12 @@ TOOLS_DEFINITIONS = [
                     "pdf_url": {
                         "type": "string",
                         "description": "The direct URL to the PDF document."
+                    },
+                    "mode": {
+                        "type": "string",
+                        "enum": ["fast", "full"],
+                        "description": "'fast' summarizes the opening pages; 'full' reads the entire paper (slower). Use 'full' only when the user asks about details beyond the introduction.",
+                        "default": "fast"
                     }
                 },
                 "required": ["pdf_url"]
@@ -1,27 +1,118 @@
-import os
-from typing import List, Dict, Any, Generator
-from openai import OpenAI
-# from anthropic import Anthropic 
+import asyncio
+import time
+from typing import List, Dict, Any, AsyncGenerator, Optional
+import httpx
+from openai import AsyncOpenAI
+# from anthropic import Anthropic, AsyncAnthropic
 # import google.generativeai as genai 
 
-from config import LLM_PROVIDER, LLM_MODEL, OPENAI_API_KEY, ANTHROPIC_API_KEY, GOOGLE_API_KEY, TOOLS_DEFINITIONS
-from utils.logger import print_streaming_response
+from config import (
+    LLM_PROVIDER,
+    LLM_MODEL,
+    OPENAI_API_KEY,
+    ANTHROPIC_API_KEY,
+    GOOGLE_API_KEY,
+    TOOLS_DEFINITIONS,
+    LLM_MAX_CONCURRENT_REQUESTS,
+    LLM_TOKENS_PER_MINUTE,
+    LLM_HTTP_MAX_CONNECTIONS,
+    LLM_MAX_OUTPUT_TOKENS,
+)
+from utils.metrics import REGISTRY, TOKEN_BUCKETS
+from utils.rate_limit import RateLimiter
+from utils.tokens import count_tokens
+
+try:
+    import h2  # noqa: F401  (enables HTTP/2 in httpx)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+LLM_QUEUE_SECONDS = REGISTRY.histogram(
+    "scout_llm_queue_seconds", "Time a completion waited for the client-side rate limiter.", ("model",)
+)
+LLM_TTFT_SECONDS = REGISTRY.histogram(
+    "scout_llm_time_to_first_chunk_seconds", "Time from request to the first streamed chunk.", ("model",)
+)
+LLM_REQUEST_SECONDS = REGISTRY.histogram(
+    "scout_llm_request_duration_seconds", "Total time of a streamed completion.", ("model", "outcome")
+)
+LLM_TOKENS = REGISTRY.histogram(
+    "scout_llm_tokens", "Estimated tokens per completion.", ("model", "direction"), buckets=TOKEN_BUCKETS
+)
+
+
+def _chunk_text(provider: str, chunk: Any) -> str:
+    """Text (including tool-call arguments) carried by one streamed chunk of any provider."""
+    if isinstance(chunk, str):
+        return chunk
+    if provider == "openai":
+        if not chunk.choices:
+            return ""
+        delta = chunk.choices[0].delta
+        arguments = "".join(tc.function.arguments or "" for tc in delta.tool_calls or [] if tc.function)
+        return (delta.content or "") + arguments
+    if provider == "anthropic":
+        return getattr(getattr(chunk, "delta", None), "text", None) or ""
+    if provider == "google":
+        return chunk.text or ""
+    return ""
+
+
+class _CompletionMetrics:
+    """Records time to first chunk, total duration and token counts for one streamed completion."""
+
+    def __init__(self, provider: str, model: str, messages: List[Dict[str, Any]]):
+        self.provider = provider
+        self.model = model
+        self.input_tokens = sum(count_tokens(str(m.get("content") or "")) for m in messages)
+        self.output: List[str] = []
+        self.start = time.perf_counter()
+        self.first_chunk_at: Optional[float] = None
+
+    def chunk(self, chunk: Any):
+        if self.first_chunk_at is None:
+            self.first_chunk_at = time.perf_counter()
+            LLM_TTFT_SECONDS.observe(self.first_chunk_at - self.start, model=self.model)
+        self.output.append(_chunk_text(self.provider, chunk))
+
+    def finish(self, outcome: str):
+        LLM_REQUEST_SECONDS.observe(time.perf_counter() - self.start, model=self.model, outcome=outcome)
+        LLM_TOKENS.observe(self.input_tokens, model=self.model, direction="input")
+        LLM_TOKENS.observe(count_tokens("".join(self.output)), model=self.model, direction="output")
+
+
+class AsyncLLMClient:
+    """Streaming chat-completion client for use inside async servers.
+
+    The provider SDK client and its HTTP/2 connection pool are created once and
+    shared; a RateLimiter caps in-flight requests and estimated tokens per minute
+    so bursts queue locally instead of tripping provider rate limits.
+    """
 
-class LLMClient:
     def __init__(self):
-        self.client = self._initialize_client()
         self.model = LLM_MODEL
         self.provider = LLM_PROVIDER
+        self.limiter = RateLimiter(LLM_MAX_CONCURRENT_REQUESTS, LLM_TOKENS_PER_MINUTE or None)
+        self._http_client = httpx.AsyncClient(
+            http2=HTTP2_AVAILABLE,
+            limits=httpx.Limits(
+                max_connections=LLM_HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=LLM_HTTP_MAX_CONNECTIONS,
+            ),
+            timeout=httpx.Timeout(120.0, connect=10.0),
+        )
+        self.client = self._initialize_client()
 
     def _initialize_client(self):
         if LLM_PROVIDER == "openai":
             if not OPENAI_API_KEY:
                 raise ValueError("OPENAI_API_KEY not found in environment variables.")
-            return OpenAI(api_key=OPENAI_API_KEY)
+            return AsyncOpenAI(api_key=OPENAI_API_KEY, http_client=self._http_client)
         elif LLM_PROVIDER == "anthropic":
             if not ANTHROPIC_API_KEY:
                 raise ValueError("ANTHROPIC_API_KEY not found in environment variables.")
-            return Anthropic(api_key=ANTHROPIC_API_KEY)
+            return AsyncAnthropic(api_key=ANTHROPIC_API_KEY, http_client=self._http_client)
         elif LLM_PROVIDER == "google":
             if not GOOGLE_API_KEY:
                 raise ValueError("GOOGLE_API_KEY not found in environment variables.")
@@ -30,36 +121,65 @@ class LLMClient:
         else:
             raise ValueError(f"Unsupported LLM_PROVIDER: {LLM_PROVIDER}")
 
-    def generate_response(self, messages: List[Dict[str, str]]) -> Generator[Dict[str, Any], None, None]:
+    async def aclose(self):
+        await self._http_client.aclose()
+
+    def _estimate_tokens(self, messages: List[Dict[str, Any]]) -> int:
+        return sum(count_tokens(str(m.get("content") or "")) for m in messages) + LLM_MAX_OUTPUT_TOKENS
+
+    async def generate_response(
+        self, messages: List[Dict[str, Any]], tools: Optional[List[Dict[str, Any]]] = TOOLS_DEFINITIONS
+    ) -> AsyncGenerator[Any, None]:
+        """Streams completion chunks; pass tools=None for plain completions such as summaries."""
+        queued_at = time.perf_counter()
+        async with self.limiter.limit(self._estimate_tokens(messages)):
+            LLM_QUEUE_SECONDS.observe(time.perf_counter() - queued_at, model=self.model)
+            # Timed from when the limiter admits the call, so queueing does not count as model latency.
+            metrics = _CompletionMetrics(self.provider, self.model, messages)
+            outcome = "error"
+            try:
+                async for chunk in self._stream_response(messages, tools):
+                    metrics.chunk(chunk)
+                    yield chunk
+                outcome = "ok"
+            except (GeneratorExit, asyncio.CancelledError):
+                outcome = "abandoned"
+                raise
+            finally:
+                metrics.finish(outcome)
+
+    async def _stream_response(
+        self, messages: List[Dict[str, Any]], tools: Optional[List[Dict[str, Any]]]
+    ) -> AsyncGenerator[Any, None]:
         if self.provider == "openai":
-            stream = self.client.chat.completions.create(
+            kwargs = {"tools": tools, "tool_choice": "auto"} if tools else {}
+            stream = await self.client.chat.completions.create(
                 model=self.model,
                 messages=messages,
-                tools=TOOLS_DEFINITIONS,
-                tool_choice="auto",
-                stream=True
+                stream=True,
+                **kwargs
             )
-            for chunk in stream:
+            async for chunk in stream:
                 yield chunk
         elif self.provider == "anthropic":
-            response = self.client.messages.create(
+            kwargs = {"tools": tools} if tools else {}
+            response = await self.client.messages.create(
                 model=self.model,
-                max_tokens=1024,
+                max_tokens=LLM_MAX_OUTPUT_TOKENS,
                 messages=messages,
-                tools=TOOLS_DEFINITIONS,
-                stream=True
+                stream=True,
+                **kwargs
             )
-            for chunk in response:
-                yield chunk.delta.text if hasattr(chunk.delta, 'text') else ''
-            pass 
+            async for chunk in response:
+                yield chunk
         elif self.provider == "google":
-            response = self.client.generate_content(
+            kwargs = {"tools": tools} if tools else {}
+            response = await self.client.generate_content_async(
                 messages,
-                tools=TOOLS_DEFINITIONS, 
-                stream=True
+                stream=True,
+                **kwargs
             )
-            for chunk in response:
-                yield chunk.text if chunk.text else ''
-            pass 
+            async for chunk in response:
+                yield chunk
         else:
-            raise ValueError(f"Streaming and tool calling not implemented for provider: {self.provider}")
\ No newline at end of file
+            raise ValueError(f"Streaming and tool calling not implemented for provider: {self.provider}")
@@ -0,0 +1,12 @@
+import pytest
+
+from utils.cache_backends import CacheBackend
+
+
+def test_incomplete_backend_fails_when_constructed():
+    class GetOnly(CacheBackend):
+        def get(self, key):
+            return None
+
+    with pytest.raises(TypeError):
+        GetOnly()
@@ -0,0 +1,24 @@
+from utils.history import ROLLING_SUMMARY_PREFIX, ConversationHistory
+
+
+def _summary(history):
+    message = history.messages[1]
+    return message["content"] if message["content"].startswith(ROLLING_SUMMARY_PREFIX) else None
+
+
+def test_summary_is_not_rewritten_every_turn_when_recent_turns_exceed_the_target():
+    # Four kept turns of ~700 tokens are above the 2400-token low-water mark on their own.
+    history = ConversationHistory(max_tokens=4000, keep_recent_turns=4)
+    history.append({"role": "system", "content": "You are helpful."})
+    summaries, totals = [], []
+    for turn in range(30):
+        history.append({"role": "user", "content": f"question {turn} " + "alpha " * 100})
+        history.append({"role": "assistant", "content": f"answer {turn} " + "beta " * 600})
+        summaries.append(_summary(history))
+        totals.append(history.total_tokens)
+
+    first = next(i for i, summary in enumerate(summaries) if summary is not None)
+    rewrites = sum(1 for before, after in zip(summaries[first:], summaries[first + 1:]) if before != after)
+    assert rewrites <= (len(summaries) - first) // 2
+    # Skipped compactions catch up later, so the history does not keep growing (30 turns are ~21000 tokens).
+    assert max(totals) < 2 * history.max_tokens
@@ -0,0 +1,16 @@
+from utils.pdf_cache import PDFTextCache
+
+
+def test_hash_hit_under_another_url_keeps_partial_text_partial(tmp_path):
+    cache = PDFTextCache(str(tmp_path), max_bytes=1_000_000, fresh_seconds=60)
+    cache.store("https://example.org/a.pdf", "digest", "leading pages", complete=False)
+
+    # What the server does when the same bytes arrive under a second URL.
+    text, complete = cache.get_by_hash("digest", max_chars=5)
+    cache.store("https://example.org/b.pdf", "digest", text, complete=complete)
+
+    for url in ("https://example.org/a.pdf", "https://example.org/b.pdf"):
+        cached = cache.lookup(url)
+        assert not cached.complete
+        assert not cached.covers(None)
+    assert cache.get_by_hash("digest") is None
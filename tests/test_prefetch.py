@@ -0,0 +1,25 @@
+import asyncio
+
+from utils.prefetch import Prefetcher
+
+
+def test_replace_only_drops_the_same_owners_queue():
+    async def scenario():
+        async def load(url):
+            return url
+
+        prefetcher = Prefetcher(load, concurrency=1, per_minute=0, max_pending=10)
+        prefetcher.start()
+        # While a foreground load runs, submissions stay queued.
+        async with prefetcher.foreground("https://example.org/current.pdf"):
+            prefetcher.submit(["https://example.org/a.pdf", "https://example.org/b.pdf"], owner="first")
+            prefetcher.submit(["https://example.org/c.pdf"], owner="second")
+            prefetcher.submit(["https://example.org/d.pdf"], owner="first")
+
+            assert prefetcher.stats()["pending"] == 2
+            assert prefetcher.stats()["cancelled"] == 2
+            # The other session's URL is still queued, so it is not queued again.
+            assert prefetcher.submit(["https://example.org/c.pdf"], replace=False, owner="third") == 0
+        await prefetcher.close()
+
+    asyncio.run(scenario())
@@ -0,0 +1,47 @@
+import asyncio
+
+import pytest
+
+from utils.cache_backends import MemoryBackend, SQLiteBackend
+from utils.sessions import SessionConflict, SessionNotFound, SessionStore
+
+
+def _stores(tmp_path, backend):
+    # Two stores on one backend stand in for two uvicorn workers.
+    if backend == "sqlite":
+        path = str(tmp_path / "sessions.sqlite3")
+        return [SessionStore(SQLiteBackend(path, 100, table="sessions"), 60, 1000, 2, "system") for _ in range(2)]
+    shared = MemoryBackend(100)
+    return [SessionStore(shared, 60, 1000, 2, "system") for _ in range(2)]
+
+
+@pytest.mark.parametrize("backend", ["memory", "sqlite"])
+def test_concurrent_turn_on_another_worker_is_rejected(tmp_path, backend):
+    first, second = _stores(tmp_path, backend)
+    session_id = first.create()
+
+    async def scenario():
+        with pytest.raises(SessionConflict):
+            async with first.turn(session_id) as history:
+                history.append({"role": "user", "content": "from the first worker"})
+                async with second.turn(session_id) as other:
+                    other.append({"role": "user", "content": "from the second worker"})
+
+    asyncio.run(scenario())
+    assert [m["content"] for m in first.load(session_id).messages][-1] == "from the second worker"
+
+
+@pytest.mark.parametrize("backend", ["memory", "sqlite"])
+def test_turn_does_not_revive_a_deleted_session(tmp_path, backend):
+    first, second = _stores(tmp_path, backend)
+    session_id = first.create()
+
+    async def scenario():
+        with pytest.raises(SessionNotFound):
+            async with first.turn(session_id) as history:
+                history.append({"role": "user", "content": "hello"})
+                second.delete(session_id)
+
+    asyncio.run(scenario())
+    with pytest.raises(SessionNotFound):
+        first.load(session_id)
@@ -0,0 +1,47 @@
+import asyncio
+
+from utils.singleflight import SingleFlight
+
+
+def test_cancelled_leader_does_not_fail_followers():
+    async def scenario():
+        flight = SingleFlight()
+        release = asyncio.Event()
+        calls = 0
+
+        async def fetch():
+            nonlocal calls
+            calls += 1
+            await release.wait()
+            return "result"
+
+        leader = asyncio.ensure_future(flight.do("key", fetch))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flight.do("key", fetch))
+        await asyncio.sleep(0)
+
+        leader.cancel()
+        await asyncio.sleep(0)
+        release.set()
+
+        assert await follower == "result"
+        assert leader.cancelled()
+        assert calls == 1
+        assert not flight.in_flight("key")
+
+    asyncio.run(scenario())
+
+
+def test_failure_reaches_every_waiter():
+    async def scenario():
+        flight = SingleFlight()
+
+        async def fail():
+            await asyncio.sleep(0)
+            raise ValueError("boom")
+
+        results = await asyncio.gather(flight.do("key", fail), flight.do("key", fail), return_exceptions=True)
+        assert [type(r) for r in results] == [ValueError, ValueError]
+        assert flight.coalesced == 1
+
+    asyncio.run(scenario())
@@ -0,0 +1,33 @@
+import asyncio
+
+import httpx
+import pytest
+
+from utils.tool_transport import AsyncToolTransport, DeadlineExceeded
+
+
+class _StalledBody(httpx.AsyncByteStream):
+    async def __aiter__(self):
+        yield b"first\n"
+        await asyncio.sleep(60)
+        yield b"never\n"
+
+
+def test_stream_body_is_bound_by_the_deadline():
+    async def scenario():
+        transport = AsyncToolTransport(
+            "stalled", "http://tool", 1, deadline=0.2, attempt_timeout=5, max_retries=0, backoff_base=0.1,
+            backoff_max=1, hedge_quantile=0, breaker_failures=3, breaker_reset_seconds=1,
+        )
+        transport._client = httpx.AsyncClient(
+            base_url="http://tool", transport=httpx.MockTransport(lambda request: httpx.Response(200, stream=_StalledBody())),
+        )
+        lines = []
+        with pytest.raises(DeadlineExceeded):
+            async with transport.stream("/stream", {}) as response:
+                async for line in response.aiter_lines():
+                    lines.append(line)
+        assert lines == ["first"]
+        await transport.aclose()
+
+    asyncio.run(asyncio.wait_for(scenario(), 5))
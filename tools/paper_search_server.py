@@ -1,63 +1,173 @@
-import requests
+import httpx
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import Response
 from pydantic import BaseModel
-import xml.etree.ElementTree as ET
 
-app = FastAPI()
+from config import (
+    ARXIV_API_URL,
+    ARXIV_TIMEOUT,
+    ARXIV_INDEX_PATH,
+    SEARCH_MODE,
+    SIMILARITY_RERANK,
+    SIMILARITY_INDEX_DIR,
+    SIMILARITY_DIM,
+    SIMILARITY_MMAP_ROWS,
+    SIMILARITY_CANDIDATE_FACTOR,
+    SIMILARITY_DUPLICATE_THRESHOLD,
+    QUERY_CACHE_BACKEND,
+    QUERY_CACHE_PATH,
+    QUERY_CACHE_TTL_SECONDS,
+    QUERY_CACHE_MAX_ENTRIES,
+    HTTP_MAX_CONNECTIONS,
+    HTTP_MAX_KEEPALIVE_CONNECTIONS,
+    HTTP_MAX_CONNECTIONS_PER_HOST,
+    HTTP_KEEPALIVE_EXPIRY,
+)
+from utils.http_pool import AsyncHTTPPool
+from utils.arxiv_feed import FeedParseError, parse_feed, search_params
+from utils import fast_json
+from utils.deadline import DeadlineMiddleware
+from utils.metrics import REGISTRY, COUNT_BUCKETS, BYTES_BUCKETS, instrument_app, span
+from utils.arxiv_index import ArxivIndex, paper_key
+from utils import similarity
+from utils.cache_backends import MemoryBackend, SQLiteBackend
+from utils.query_cache import QueryCache
+
+if SEARCH_MODE not in ("live", "index", "index_first"):
+    raise ValueError(f"Unsupported SEARCH_MODE: {SEARCH_MODE}")
+
+http_pool = AsyncHTTPPool(
+    max_connections=HTTP_MAX_CONNECTIONS,
+    max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+    max_per_host=HTTP_MAX_CONNECTIONS_PER_HOST,
+    keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+    timeout=ARXIV_TIMEOUT,
+)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await http_pool.start()
+    if similarity_index is not None:
+        _load_similarity_index()
+    yield
+    await http_pool.close()
+    if similarity_index is not None:
+        similarity_index.save()
+
+app = FastAPI(lifespan=lifespan)
+instrument_app(app, "paper_search")
+app.add_middleware(DeadlineMiddleware)
+
+ARXIV_RESPONSE_BYTES = REGISTRY.histogram(
+    "scout_arxiv_response_bytes", "Size of arXiv API responses.", buckets=BYTES_BUCKETS
+)
+PAPERS_RETURNED = REGISTRY.histogram(
+    "scout_papers_returned", "Papers returned per search.", ("source",), buckets=COUNT_BUCKETS
+)
+
+arxiv_index = ArxivIndex(ARXIV_INDEX_PATH)
+
+similarity_index = (
+    similarity.SimilarityIndex(SIMILARITY_INDEX_DIR, SIMILARITY_DIM, SIMILARITY_MMAP_ROWS)
+    if SIMILARITY_RERANK and similarity.AVAILABLE else None
+)
+# Candidates fetched per search, re-ranked down to max_results.
+CANDIDATE_FACTOR = SIMILARITY_CANDIDATE_FACTOR if similarity_index is not None else 1
+
+def _load_similarity_index():
+    """Loads the saved vectors and adds whatever the arXiv index gained since they were saved."""
+    similarity_index.load()
+    for papers in arxiv_index.iter_papers():
+        similarity_index.add([p for p in papers if paper_key(p.title, p.pdf_url) not in similarity_index])
+
+if QUERY_CACHE_BACKEND == "memory":
+    query_cache = QueryCache(MemoryBackend(QUERY_CACHE_MAX_ENTRIES), QUERY_CACHE_TTL_SECONDS)
+elif QUERY_CACHE_BACKEND == "sqlite":
+    query_cache = QueryCache(SQLiteBackend(QUERY_CACHE_PATH, QUERY_CACHE_MAX_ENTRIES), QUERY_CACHE_TTL_SECONDS)
+elif QUERY_CACHE_BACKEND == "none":
+    query_cache = None
+else:
+    raise ValueError(f"Unsupported QUERY_CACHE_BACKEND: {QUERY_CACHE_BACKEND}")
 
 class PaperSearchRequest(BaseModel):
     query: str
     max_results: int = 5 # default
 
+class SimilarPapersRequest(BaseModel):
+    pdf_url: str
+    max_results: int = 5
+
+async def _fetch_arxiv(query: str, max_results: int):
+    with span("paper_search", "arxiv_fetch"):
+        response = await http_pool.get(ARXIV_API_URL, params=search_params(query, max_results))
+        response.raise_for_status()
+    ARXIV_RESPONSE_BYTES.observe(len(response.content))
+    with span("paper_search", "arxiv_parse"):
+        papers = parse_feed(response.content)
+    # Every live response also feeds the local index.
+    with span("paper_search", "index_update"):
+        arxiv_index.add_papers(papers)
+        if similarity_index is not None:
+            similarity_index.add(papers)
+    return papers
+
+async def _fetch_live(query: str, max_results: int):
+    if query_cache is None:
+        return await _fetch_arxiv(query, max_results)
+    return await query_cache.get_or_fetch(query, max_results, lambda: _fetch_arxiv(query, max_results))
+
+def _rank(query: str, papers, max_results: int):
+    if similarity_index is None:
+        return papers[:max_results]
+    with span("paper_search", "similarity_rank"):
+        return similarity_index.rank(query, papers, max_results, SIMILARITY_DUPLICATE_THRESHOLD)
+
+def _json_response(body) -> Response:
+    # Paper records are encoded directly, skipping FastAPI's jsonable_encoder pass.
+    return Response(content=fast_json.dumps(body), media_type="application/json")
+
 @app.post("/paper_search")
 async def paper_search(request: PaperSearchRequest):
     query = request.query
     max_results = request.max_results
-
-    arxiv_url = "http://export.arxiv.org/api/query"
-    params = {
-        "search_query": f"all:{query}",
-        "start": 0,
-        "max_results": max_results,
-        "sortBy": "submittedDate",
-        "sortOrder": "descending"
-    }
+    candidates = max_results * CANDIDATE_FACTOR
 
     try:
-        response = requests.get(arxiv_url, params=params, timeout=10)
-        response.raise_for_status()
-        
-        root = ET.fromstring(response.content)
-        
-        ns = {'atom': 'http://www.w3.org/2005/Atom'}
-        
-        papers = []
-        for entry in root.findall('atom:entry', ns):
-            title = entry.find('atom:title', ns).text.strip()
-            summary = entry.find('atom:summary', ns).text.strip()
-            
-            pdf_link = None
-            for link in entry.findall('atom:link', ns):
-                if link.get('title') == 'pdf':
-                    pdf_link = link.get('href')
-                    break
-            
-            authors = [author.find('atom:name', ns).text for author in entry.findall('atom:author', ns)]
-            published = entry.find('atom:published', ns).text
-            
-            papers.append({
-                "title": title,
-                "authors": authors,
-                "published": published,
-                "summary": summary,
-                "pdf_url": pdf_link
-            })
-        
-        return {"status": "success", "papers": papers}
-
-    except requests.exceptions.RequestException as e:
+        if SEARCH_MODE in ("index", "index_first"):
+            with span("paper_search", "index_search"):
+                # index_first only trusts papers matching every term; anything looser goes to arXiv.
+                papers = arxiv_index.search(query, candidates, match_any=SEARCH_MODE == "index")
+            if SEARCH_MODE == "index" or len(papers) >= max_results:
+                papers = _rank(query, papers, max_results)
+                PAPERS_RETURNED.observe(len(papers), source="index")
+                return _json_response({"status": "success", "papers": papers, "source": "index"})
+
+        papers = _rank(query, await _fetch_live(query, candidates), max_results)
+        PAPERS_RETURNED.observe(len(papers), source="live")
+        return _json_response({"status": "success", "papers": papers, "source": "live"})
+
+    except httpx.HTTPError as e:
         raise HTTPException(status_code=500, detail=f"Failed to connect to arXiv API: {e}")
-    except ET.ParseError:
+    except FeedParseError:
         raise HTTPException(status_code=500, detail="Failed to parse arXiv API response (invalid XML).")
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"An unexpected error occurred: {e}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"An unexpected error occurred: {e}")
+
+@app.post("/paper_similar")
+async def paper_similar(request: SimilarPapersRequest):
+    """Indexed papers most like the given one ("more like this"), most similar first."""
+    if similarity_index is None:
+        raise HTTPException(status_code=503, detail="Similarity search is disabled (SIMILARITY_RERANK=false or numpy missing).")
+    with span("paper_search", "similarity_lookup"):
+        try:
+            matches = similarity_index.similar(request.pdf_url, request.max_results, SIMILARITY_DUPLICATE_THRESHOLD)
+        except KeyError:
+            raise HTTPException(status_code=404, detail="Paper not in the local index; find it with paper_search first.")
+        papers = arxiv_index.get_papers([key for key, _ in matches])
+    PAPERS_RETURNED.observe(len(papers), source="similar")
+    return _json_response({"status": "success", "papers": papers, "source": "similar"})
+
+@app.get("/cache_stats")
+async def cache_stats():
+    return {"query": query_cache.stats() if query_cache is not None else None}
@@ -1,80 +1,391 @@
-import requests
+import httpx
+from contextlib import asynccontextmanager
+import asyncio
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from PyPDF2 import PdfReader
-import io
-import time 
-import os
+from typing import Callable, Dict, List, Literal, Optional
 
-from llm_client import LLMClient 
-from config import LLM_MODEL
+from llm_client import AsyncLLMClient
+from config import (
+    LLM_MODEL,
+    PDF_DOWNLOAD_TIMEOUT,
+    PDF_MAX_DOWNLOAD_BYTES,
+    PDF_SPOOL_THRESHOLD_BYTES,
+    PDF_CACHE_DIR,
+    PDF_CACHE_MAX_BYTES,
+    PDF_CACHE_FRESH_SECONDS,
+    PDF_EXTRACT_WORKERS,
+    PDF_EXTRACT_QUEUE_DEPTH,
+    PDF_EXTRACT_PAGES_PER_TASK,
+    PDF_EXTRACT_RETRY_AFTER,
+    SUMMARY_TEXT_BUDGET,
+    SUMMARY_CHUNK_TOKENS,
+    SUMMARY_MAP_CONCURRENCY,
+    SUMMARY_CACHE_MAX_ENTRIES,
+    SUMMARY_CACHE_TTL_SECONDS,
+    PDF_BATCH_MAX_CONCURRENCY,
+    PDF_BATCH_MAX_URLS,
+    PDF_PREFETCH_CONCURRENCY,
+    PDF_PREFETCH_PER_MINUTE,
+    PDF_PREFETCH_MAX_PENDING,
+    HTTP_MAX_CONNECTIONS,
+    HTTP_MAX_KEEPALIVE_CONNECTIONS,
+    HTTP_MAX_CONNECTIONS_PER_HOST,
+    HTTP_KEEPALIVE_EXPIRY,
+)
+from utils import fast_json, sse
+from utils.http_pool import AsyncHTTPPool
+from utils.pdf_cache import PDFTextCache
+from utils.pdf_extract import PDFExtractionPool, ExtractionPoolBusy
+from utils.pdf_spool import spool_response, PDFTooLarge
+from utils.prefetch import Prefetcher
+from utils.summary_cache import SummaryCache, summary_key
+from utils.chunking import chunk_paper
+from utils.deadline import DeadlineMiddleware
+from utils.metrics import REGISTRY, BYTES_BUCKETS, COUNT_BUCKETS, instrument_app, span
 
-app = FastAPI()
+# Bump whenever the summarization prompt or the text truncation changes, so stale summaries are not reused.
+SUMMARY_PROMPT_VERSION = "v1"
+SUMMARY_SYSTEM_PROMPT = "You are a helpful assistant specialized in summarizing scientific papers. Summarize the provided text from a PDF succinctly and accurately."
 
-llm_summarizer = LLMClient() 
+# Full-paper mode: each chunk is summarized on its own (map), then the partial summaries are merged (reduce).
+# The versions are independent so a new reduce prompt still reuses cached chunk summaries.
+MAP_PROMPT_VERSION = "map-v1"
+MAP_SYSTEM_PROMPT = "You are a helpful assistant specialized in scientific papers. You will receive one section of a longer paper. Summarize its key points, methods, results and any numbers that matter, in a few sentences."
+REDUCE_PROMPT_VERSION = "reduce-v1"
+REDUCE_SYSTEM_PROMPT = "You are a helpful assistant specialized in summarizing scientific papers. You will receive summaries of consecutive sections of one paper. Merge them into a single succinct and accurate summary of the whole paper."
+
+http_pool = AsyncHTTPPool(
+    max_connections=HTTP_MAX_CONNECTIONS,
+    max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+    max_per_host=HTTP_MAX_CONNECTIONS_PER_HOST,
+    keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+    timeout=PDF_DOWNLOAD_TIMEOUT,
+)
+
+text_cache = PDFTextCache(PDF_CACHE_DIR, PDF_CACHE_MAX_BYTES, PDF_CACHE_FRESH_SECONDS)
+summary_cache = SummaryCache(SUMMARY_CACHE_MAX_ENTRIES, SUMMARY_CACHE_TTL_SECONDS)
+extraction_pool = PDFExtractionPool(
+    workers=PDF_EXTRACT_WORKERS,
+    queue_depth=PDF_EXTRACT_QUEUE_DEPTH,
+    pages_per_task=PDF_EXTRACT_PAGES_PER_TASK,
+    retry_after=PDF_EXTRACT_RETRY_AFTER,
+)
+# Warms text_cache with the text a fast-mode summary needs, on the background extraction worker.
+prefetcher = Prefetcher(
+    lambda pdf_url: _load_pdf_text(pdf_url, SUMMARY_TEXT_BUDGET, background=True),
+    concurrency=PDF_PREFETCH_CONCURRENCY,
+    per_minute=PDF_PREFETCH_PER_MINUTE,
+    max_pending=PDF_PREFETCH_MAX_PENDING,
+)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await http_pool.start()
+    extraction_pool.start()
+    prefetcher.start()
+    yield
+    await prefetcher.close()
+    extraction_pool.close()
+    await http_pool.close()
+    await llm_summarizer.aclose()
+
+app = FastAPI(lifespan=lifespan)
+instrument_app(app, "pdf_summarize")
+app.add_middleware(DeadlineMiddleware)
+
+PDF_DOWNLOAD_BYTES = REGISTRY.histogram(
+    "scout_pdf_download_bytes", "Size of downloaded PDF bodies.", buckets=BYTES_BUCKETS
+)
+SUMMARY_CHUNKS = REGISTRY.histogram(
+    "scout_summary_chunks", "Chunks map-reduced per full-mode summary.", buckets=COUNT_BUCKETS
+)
+
+llm_summarizer = AsyncLLMClient()
 
 class PDFSummarizeRequest(BaseModel):
     pdf_url: str
+    # "fast" summarizes the first SUMMARY_TEXT_BUDGET characters; "full" map-reduces the whole paper.
+    mode: Literal["fast", "full"] = "fast"
+    # Stream the summary as server-sent events while the LLM writes it.
+    stream: bool = False
 
-@app.post("/pdf_summarize")
-async def pdf_summarize(request: PDFSummarizeRequest):
-    pdf_url = request.pdf_url
-    
-    # 1. download PDF
+class PDFSummarizeBatchRequest(BaseModel):
+    pdf_urls: List[str]
+    mode: Literal["fast", "full"] = "fast"
+
+class PDFPrefetchRequest(BaseModel):
+    pdf_urls: List[str]
+    # Drop prefetches still queued from this session's earlier requests (e.g. the previous search's results).
+    replace: bool = True
+    session_id: Optional[str] = None
+
+async def _load_pdf_text(pdf_url: str, max_chars: Optional[int] = SUMMARY_TEXT_BUDGET, background: bool = False) -> str:
+    """Returns at least `max_chars` of the PDF's text (all of it if None), downloading and parsing only on a cache miss."""
+    cached = text_cache.lookup(pdf_url)
+    if cached is not None and not cached.covers(max_chars):
+        cached = None
+    if cached is not None and cached.fresh:
+        text_cache.count("hits")
+        return cached.text
+
+    # 1. download PDF (conditionally, if we hold validators for a stale entry), streaming the body to a spool
     try:
-        response = requests.get(pdf_url, stream=True, timeout=30)
-        response.raise_for_status()
-        
-        # Check if content type is PDF
-        if 'application/pdf' not in response.headers.get('Content-Type', ''):
-            raise HTTPException(status_code=400, detail="Provided URL does not point to a PDF.")
+        headers = cached.conditional_headers() if cached is not None else {}
+        with span("pdf_summarize", "download"):
+            async with http_pool.stream("GET", pdf_url, headers=headers, follow_redirects=True) as response:
+                if response.status_code == 304 and cached is not None:
+                    text_cache.mark_validated(pdf_url)
+                    text_cache.count("hits")
+                    text_cache.count("revalidated")
+                    return cached.text
+
+                response.raise_for_status()
 
-        pdf_bytes = io.BytesIO(response.content)
+                # Check if content type is PDF
+                if 'application/pdf' not in response.headers.get('Content-Type', ''):
+                    raise HTTPException(status_code=400, detail="Provided URL does not point to a PDF.")
 
-    except requests.exceptions.RequestException as e:
+                etag = response.headers.get("ETag")
+                last_modified = response.headers.get("Last-Modified")
+                pdf = await spool_response(response, PDF_MAX_DOWNLOAD_BYTES, PDF_SPOOL_THRESHOLD_BYTES)
+        PDF_DOWNLOAD_BYTES.observe(pdf.size)
+
+    except HTTPException:
+        raise
+    except PDFTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except httpx.HTTPError as e:
         raise HTTPException(status_code=500, detail=f"Failed to download PDF from {pdf_url}: {e}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"An unexpected error during PDF download: {e}")
 
-    # 2. extract text from PDF
-    text_content = ""
     try:
-        reader = PdfReader(pdf_bytes)
-        for page in reader.pages:
-            text_content += page.extract_text() or "" # Handle pages with no extractable text
-        
+        text_cache.count("misses")
+
+        # Same bytes under a different URL (or a changed ETag with unchanged content) need no re-parse.
+        stored = text_cache.get_by_hash(pdf.digest, max_chars)
+        if stored is not None:
+            text_content, complete = stored
+            text_cache.store(pdf_url, pdf.digest, text_content, etag, last_modified, complete)
+            return text_content
+
+        # 2. extract text from PDF (off the event loop, in parallel page ranges, stopping at the text budget)
+        try:
+            with span("pdf_summarize", "extract"):
+                text_content, complete = await extraction_pool.extract(pdf.source, max_chars, background)
+        except ExtractionPoolBusy as e:
+            raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Failed to extract text from PDF: {e}")
+
         if not text_content.strip():
             raise HTTPException(status_code=400, detail="No readable text found in the PDF.")
-            
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to extract text from PDF: {e}")
 
-    # 3. summarize using LLM
+        text_cache.store(pdf_url, pdf.digest, text_content, etag, last_modified, complete)
+        return text_content
+    finally:
+        pdf.cleanup()
+
+# Receives summary text as the LLM streams it.
+DeltaCallback = Optional[Callable[[str], None]]
+
+async def _complete(messages: List[Dict[str, str]], on_delta: DeltaCallback = None) -> str:
+    summary_chunks = []
+    async for chunk in llm_summarizer.generate_response(messages, tools=None):
+        content = None
+        if llm_summarizer.provider == "openai":
+            content = chunk.choices[0].delta.content
+        elif llm_summarizer.provider == "anthropic":
+           if hasattr(chunk.delta, 'text'):
+               content = chunk.delta.text
+        elif llm_summarizer.provider == "google":
+           content = chunk.text
+        if content:
+            summary_chunks.append(content)
+            if on_delta is not None:
+                on_delta(content)
+
+    summary = "".join(summary_chunks)
+
+    if not summary.strip():
+        raise HTTPException(status_code=500, detail="LLM failed to generate a summary.")
+    return summary
+
+async def _cached_completion(
+    text: str, system_prompt: str, prompt_version: str, user_prefix: str, on_delta: DeltaCallback = None
+) -> str:
+    """Runs one memoized LLM completion; concurrent requests for the same text share one call.
+
+    `on_delta` only sees text when this call runs the LLM itself, not on a cache hit or a shared call.
+    """
+    messages = [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": f"{user_prefix}\n\n{text}"},
+    ]
+    key = summary_key(text, LLM_MODEL, prompt_version)
+    return await summary_cache.get_or_compute(key, lambda: _complete(messages, on_delta))
+
+async def _summarize_fast(text_content: str, on_delta: DeltaCallback = None) -> str:
+    return await _cached_completion(
+        text_content[:SUMMARY_TEXT_BUDGET], # text limit to avoid token limit
+        SUMMARY_SYSTEM_PROMPT,
+        SUMMARY_PROMPT_VERSION,
+        "Please summarize the following scientific paper text:",
+        on_delta,
+    )
+
+async def _summarize_full(text_content: str, on_delta: DeltaCallback = None) -> str:
+    """Map-reduce summary; only the final (reduce) completion is streamed to `on_delta`."""
+    chunks = chunk_paper(text_content, SUMMARY_CHUNK_TOKENS)
+    SUMMARY_CHUNKS.observe(len(chunks))
+    if len(chunks) == 1:
+        return await _cached_completion(
+            chunks[0], SUMMARY_SYSTEM_PROMPT, SUMMARY_PROMPT_VERSION,
+            "Please summarize the following scientific paper text:",
+            on_delta,
+        )
+
+    map_slots = asyncio.Semaphore(SUMMARY_MAP_CONCURRENCY)
+
+    async def summarize_chunk(index: int, chunk: str) -> str:
+        async with map_slots:
+            return await _cached_completion(
+                chunk, MAP_SYSTEM_PROMPT, MAP_PROMPT_VERSION,
+                f"Summarize part {index + 1} of {len(chunks)} of a scientific paper:",
+            )
+
+    with span("pdf_summarize", "map"):
+        partials = await asyncio.gather(*(summarize_chunk(i, c) for i, c in enumerate(chunks)))
+    merged = "\n\n".join(f"Part {i + 1}:\n{p}" for i, p in enumerate(partials))
+    with span("pdf_summarize", "reduce"):
+        return await _cached_completion(
+            merged, REDUCE_SYSTEM_PROMPT, REDUCE_PROMPT_VERSION,
+            "Combine these section summaries into one summary of the paper:",
+            on_delta,
+        )
+
+async def _load_text_for_mode(pdf_url: str, mode: str) -> str:
+    with span("pdf_summarize", "load_text"):
+        async with prefetcher.foreground(pdf_url):
+            return await _load_pdf_text(pdf_url, None if mode == "full" else SUMMARY_TEXT_BUDGET)
+
+async def _summarize_text(text_content: str, mode: str, on_delta: DeltaCallback = None) -> str:
+    # 3. summarize using LLM (memoized per text and prompt)
     try:
-        messages = [
-            {"role": "system", "content": "You are a helpful assistant specialized in summarizing scientific papers. Summarize the provided text from a PDF succinctly and accurately."},
-            {"role": "user", "content": f"Please summarize the following scientific paper text:\n\n{text_content[:8000]}"} # text limit to avoid token limit
-        ]
-
-        summary_chunks = []
-        for chunk in llm_summarizer.generate_response(messages):
-            if llm_summarizer.provider == "openai":
-                content = chunk.choices[0].delta.content
-                if content:
-                    summary_chunks.append(content)
-            elif llm_summarizer.provider == "anthropic":
-               if hasattr(chunk.delta, 'text'):
-                   summary_chunks.append(chunk.delta.text)
-            elif llm_summarizer.provider == "google":
-               if chunk.text:
-                   summary_chunks.append(chunk.text)
-        
-        summary = "".join(summary_chunks)
-
-        if not summary.strip():
-            raise HTTPException(status_code=500, detail="LLM failed to generate a summary.")
-
-        return {"status": "success", "summary": summary}
+        with span("pdf_summarize", "summarize"):
+            if mode == "full":
+                return await _summarize_full(text_content, on_delta)
+            return await _summarize_fast(text_content, on_delta)
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to summarize PDF content with LLM: {e}")
+
+async def _summarize_url(pdf_url: str, mode: str) -> str:
+    return await _summarize_text(await _load_text_for_mode(pdf_url, mode), mode)
+
+async def _stream_summary(text_content: str, mode: str):
+    """Yields SSE events: "delta" per piece of summary text, then "done" with the full summary (or "error")."""
+    deltas: asyncio.Queue = asyncio.Queue()
+    task = asyncio.ensure_future(_summarize_text(text_content, mode, deltas.put_nowait))
+    streamed = False
+    try:
+        while not task.done() or not deltas.empty():
+            if deltas.empty():
+                next_delta = asyncio.ensure_future(deltas.get())
+                await asyncio.wait({next_delta, task}, return_when=asyncio.FIRST_COMPLETED)
+                if not next_delta.done():
+                    next_delta.cancel()
+                    continue
+                delta = next_delta.result()
+            else:
+                delta = deltas.get_nowait()
+            streamed = True
+            yield sse.encode("delta", {"text": delta})
+
+        try:
+            summary = task.result()
+        except HTTPException as e:
+            yield sse.encode("error", {"status_code": e.status_code, "detail": e.detail})
+            return
+        if not streamed:
+            # Cache hit or a call shared with another request: nothing was streamed, send it whole.
+            yield sse.encode("delta", {"text": summary})
+        yield sse.encode("done", {"status": "success", "summary": summary})
+    finally:
+        # The client went away: stop work nobody will read.
+        task.cancel()
+
+@app.post("/pdf_summarize")
+async def pdf_summarize(request: PDFSummarizeRequest):
+    if request.stream:
+        # Download and extraction errors still come back as HTTP errors; the stream starts with the LLM.
+        text_content = await _load_text_for_mode(request.pdf_url, request.mode)
+        return StreamingResponse(
+            _stream_summary(text_content, request.mode),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+    summary = await _summarize_url(request.pdf_url, request.mode)
+    return {"status": "success", "summary": summary}
+
+@app.post("/pdf_summarize_batch")
+async def pdf_summarize_batch(request: PDFSummarizeBatchRequest):
+    """Summarizes several PDFs concurrently, streaming one NDJSON line per PDF as soon as it is done.
+
+    Each line carries the PDF's `index` in the request; a final line with
+    status "done" marks the end of the batch.
+    """
+    if not request.pdf_urls:
+        raise HTTPException(status_code=400, detail="pdf_urls must not be empty.")
+    if len(request.pdf_urls) > PDF_BATCH_MAX_URLS:
+        raise HTTPException(status_code=400, detail=f"At most {PDF_BATCH_MAX_URLS} PDFs per batch.")
+
+    # Papers move through download, extraction and LLM calls independently, so one
+    # paper's LLM call overlaps the next paper's download.
+    slots = asyncio.Semaphore(PDF_BATCH_MAX_CONCURRENCY)
+
+    async def summarize_one(index: int, pdf_url: str) -> Dict[str, object]:
+        async with slots:
+            try:
+                summary = await _summarize_url(pdf_url, request.mode)
+                return {"index": index, "pdf_url": pdf_url, "status": "success", "summary": summary}
+            except HTTPException as e:
+                return {"index": index, "pdf_url": pdf_url, "status": "error",
+                        "status_code": e.status_code, "detail": e.detail}
+            except Exception as e:
+                return {"index": index, "pdf_url": pdf_url, "status": "error",
+                        "status_code": 500, "detail": f"Failed to summarize PDF: {e}"}
+
+    async def results():
+        tasks = [asyncio.ensure_future(summarize_one(i, url)) for i, url in enumerate(request.pdf_urls)]
+        succeeded = 0
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                result = await next_done
+                succeeded += result["status"] == "success"
+                yield fast_json.dumps(result) + b"\n"
+            yield fast_json.dumps({"status": "done", "succeeded": succeeded, "failed": len(tasks) - succeeded}) + b"\n"
+        finally:
+            # The client went away: stop work nobody will read.
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(results(), media_type="application/x-ndjson")
+
+@app.post("/pdf_prefetch", status_code=202)
+async def pdf_prefetch(request: PDFPrefetchRequest):
+    """Queues PDFs for background download and extraction; returns before any of it happens."""
+    queued = prefetcher.submit(request.pdf_urls, replace=request.replace, owner=request.session_id)
+    return {"status": "accepted", "queued": queued}
+
+@app.delete("/pdf_prefetch")
+async def cancel_pdf_prefetch():
+    return {"status": "success", "cancelled": prefetcher.cancel_all()}
+
+@app.get("/cache_stats")
+async def cache_stats():
+    return {"pdf_text": text_cache.stats(), "summary": summary_cache.stats(), "prefetch": prefetcher.stats()}
@@ -0,0 +1,103 @@
+import io
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional
+
+try:
+    from lxml import etree as lxml_etree
+except ImportError:  # optional; the standard library parser is used instead
+    lxml_etree = None
+
+ATOM = "{http://www.w3.org/2005/Atom}"
+
+# Precompiled Clark-notation tag names, compared directly instead of namespaced find() lookups.
+ENTRY = ATOM + "entry"
+TITLE = ATOM + "title"
+SUMMARY = ATOM + "summary"
+AUTHOR = ATOM + "author"
+NAME = ATOM + "name"
+LINK = ATOM + "link"
+PUBLISHED = ATOM + "published"
+
+# Errors raised for malformed feeds by whichever parser is in use.
+FeedParseError = (ET.ParseError,) if lxml_etree is None else (ET.ParseError, lxml_etree.XMLSyntaxError)
+
+
+@dataclass
+class Paper:
+    """Compact paper record; serializes to the same JSON shape the API has always returned."""
+
+    __slots__ = ("title", "authors", "published", "summary", "pdf_url")
+    title: str
+    authors: List[str]
+    published: Optional[str]
+    summary: str
+    pdf_url: Optional[str]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "title": self.title,
+            "authors": self.authors,
+            "published": self.published,
+            "summary": self.summary,
+            "pdf_url": self.pdf_url,
+        }
+
+
+def search_params(query: str, max_results: int, start: int = 0) -> Dict[str, Any]:
+    """Query parameters for the arXiv API, newest submissions first."""
+    return {
+        "search_query": f"all:{query}",
+        "start": start,
+        "max_results": max_results,
+        "sortBy": "submittedDate",
+        "sortOrder": "descending"
+    }
+
+
+def _paper_from_entry(entry) -> Paper:
+    title = summary = ""
+    published = pdf_link = None
+    authors = []
+    # One pass over the entry's children instead of a find() per field.
+    for child in entry:
+        tag = child.tag
+        if tag == TITLE:
+            title = (child.text or "").strip()
+        elif tag == SUMMARY:
+            summary = (child.text or "").strip()
+        elif tag == AUTHOR:
+            for name in child:
+                if name.tag == NAME:
+                    authors.append(name.text)
+                    break
+        elif tag == LINK:
+            if pdf_link is None and child.get("title") == "pdf":
+                pdf_link = child.get("href")
+        elif tag == PUBLISHED:
+            published = child.text
+    return Paper(title, authors, published, summary, pdf_link)
+
+
+def iter_papers(content: bytes) -> Iterator[Paper]:
+    """Streams Paper records out of an arXiv Atom feed, freeing each entry once parsed.
+
+    Uses lxml when installed and xml.etree otherwise; malformed XML raises one of FeedParseError.
+    """
+    if lxml_etree is not None:
+        for _, entry in lxml_etree.iterparse(io.BytesIO(content), events=("end",), tag=ENTRY):
+            yield _paper_from_entry(entry)
+            entry.clear()
+            while entry.getprevious() is not None:
+                del entry.getparent()[0]
+        return
+
+    for _, elem in ET.iterparse(io.BytesIO(content), events=("end",)):
+        if elem.tag == ENTRY:
+            yield _paper_from_entry(elem)
+            elem.clear()
+
+
+def parse_feed(content: bytes) -> List[Paper]:
+    """Parses an arXiv Atom feed into Paper records."""
+    return list(iter_papers(content))
@@ -0,0 +1,244 @@
+"""Local SQLite FTS5 index of arXiv paper metadata.
+
+The paper_search server fills it from live search responses; it can also be
+synced ahead of time from the arXiv API or loaded from saved Atom feeds:
+
+    python -m utils.arxiv_index sync "large language models" --max 2000
+    python -m utils.arxiv_index load feeds/*.xml
+"""
+import argparse
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Iterable, Iterator, List, Optional
+
+import httpx
+
+from utils.arxiv_feed import Paper, parse_feed, search_params
+
+WORD = re.compile(r"\w+", re.UNICODE)
+
+# bm25() column weights for (title, summary, authors): title matches count most.
+BM25_WEIGHTS = (10.0, 1.0, 3.0)
+
+
+def paper_key(title: str, pdf_url: Optional[str]) -> str:
+    """Identity of a paper across searches: its PDF URL, or its title when it has none."""
+    return pdf_url or title
+
+
+def _fts_query(query: str, operator: str) -> Optional[str]:
+    words = WORD.findall(query.lower())
+    if not words:
+        return None
+    # Quote every term so user input can never be read as FTS5 syntax.
+    return f" {operator} ".join(f'"{word}"' for word in words)
+
+
+class ArxivIndex:
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript(
+            """
+            PRAGMA journal_mode = WAL;
+            CREATE TABLE IF NOT EXISTS papers (
+                rowid INTEGER PRIMARY KEY,
+                paper_key TEXT UNIQUE NOT NULL,
+                title TEXT NOT NULL,
+                summary TEXT NOT NULL,
+                authors TEXT NOT NULL,
+                published TEXT,
+                pdf_url TEXT
+            );
+            CREATE VIRTUAL TABLE IF NOT EXISTS papers_fts USING fts5(
+                title, summary, authors, content='papers', content_rowid='rowid'
+            );
+            CREATE TRIGGER IF NOT EXISTS papers_ai AFTER INSERT ON papers BEGIN
+                INSERT INTO papers_fts (rowid, title, summary, authors)
+                VALUES (new.rowid, new.title, new.summary, new.authors);
+            END;
+            CREATE TRIGGER IF NOT EXISTS papers_ad AFTER DELETE ON papers BEGIN
+                INSERT INTO papers_fts (papers_fts, rowid, title, summary, authors)
+                VALUES ('delete', old.rowid, old.title, old.summary, old.authors);
+            END;
+            CREATE TRIGGER IF NOT EXISTS papers_au AFTER UPDATE ON papers BEGIN
+                INSERT INTO papers_fts (papers_fts, rowid, title, summary, authors)
+                VALUES ('delete', old.rowid, old.title, old.summary, old.authors);
+                INSERT INTO papers_fts (rowid, title, summary, authors)
+                VALUES (new.rowid, new.title, new.summary, new.authors);
+            END;
+            CREATE TABLE IF NOT EXISTS sync_state (
+                sync_key TEXT PRIMARY KEY,
+                last_published TEXT NOT NULL
+            );
+            """
+        )
+        self._db.commit()
+
+    def add_papers(self, papers: Iterable[Paper]) -> int:
+        """Inserts or updates papers (as returned by utils.arxiv_feed.parse_feed)."""
+        rows = [
+            (
+                paper_key(paper.title, paper.pdf_url),
+                paper.title,
+                paper.summary,
+                json.dumps(paper.authors),
+                paper.published,
+                paper.pdf_url,
+            )
+            for paper in papers
+        ]
+        with self._lock:
+            self._db.executemany(
+                """
+                INSERT INTO papers (paper_key, title, summary, authors, published, pdf_url)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (paper_key) DO UPDATE SET
+                    title = excluded.title, summary = excluded.summary, authors = excluded.authors,
+                    published = excluded.published, pdf_url = excluded.pdf_url
+                """,
+                rows,
+            )
+            self._db.commit()
+        return len(rows)
+
+    def search(self, query: str, max_results: int, match_any: bool = True) -> List[Paper]:
+        """BM25-ranked papers matching all query terms; with `match_any`, any of them if none match all."""
+        for operator in ("AND", "OR") if match_any else ("AND",):
+            fts_query = _fts_query(query, operator)
+            if fts_query is None:
+                return []
+            with self._lock:
+                rows = self._db.execute(
+                    f"""
+                    SELECT p.title, p.authors, p.published, p.summary, p.pdf_url
+                    FROM papers_fts JOIN papers p ON p.rowid = papers_fts.rowid
+                    WHERE papers_fts MATCH ?
+                    ORDER BY bm25(papers_fts, {', '.join(map(str, BM25_WEIGHTS))})
+                    LIMIT ?
+                    """,
+                    (fts_query, max_results),
+                ).fetchall()
+            if rows:
+                break
+        return [
+            Paper(title, json.loads(authors), published, summary, pdf_url)
+            for title, authors, published, summary, pdf_url in rows
+        ]
+
+    def get_papers(self, keys: List[str]) -> List[Paper]:
+        """Papers stored under `keys` (see paper_key), in the order given; unknown keys are skipped."""
+        if not keys:
+            return []
+        with self._lock:
+            rows = self._db.execute(
+                f"""
+                SELECT paper_key, title, authors, published, summary, pdf_url FROM papers
+                WHERE paper_key IN ({', '.join('?' * len(keys))})
+                """,
+                keys,
+            ).fetchall()
+        by_key = {
+            key: Paper(title, json.loads(authors), published, summary, pdf_url)
+            for key, title, authors, published, summary, pdf_url in rows
+        }
+        return [by_key[key] for key in keys if key in by_key]
+
+    def iter_papers(self, batch_size: int = 1000) -> Iterator[List[Paper]]:
+        """All stored papers, in batches of `batch_size`."""
+        last_rowid = 0
+        while True:
+            with self._lock:
+                rows = self._db.execute(
+                    """
+                    SELECT rowid, title, authors, published, summary, pdf_url FROM papers
+                    WHERE rowid > ? ORDER BY rowid LIMIT ?
+                    """,
+                    (last_rowid, batch_size),
+                ).fetchall()
+            if not rows:
+                return
+            last_rowid = rows[-1][0]
+            yield [
+                Paper(title, json.loads(authors), published, summary, pdf_url)
+                for _, title, authors, published, summary, pdf_url in rows
+            ]
+
+    def count(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM papers").fetchone()[0]
+
+    def last_published(self, sync_key: str) -> Optional[str]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT last_published FROM sync_state WHERE sync_key = ?", (sync_key,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def set_last_published(self, sync_key: str, published: str):
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO sync_state (sync_key, last_published) VALUES (?, ?)",
+                (sync_key, published),
+            )
+            self._db.commit()
+
+
+def sync(index: ArxivIndex, api_url: str, query: str, batch_size: int, max_papers: int, delay: float) -> int:
+    """Pulls papers for `query` newest-first until reaching the last-seen `published` timestamp."""
+    watermark = index.last_published(query)
+    newest = watermark
+    added = 0
+    with httpx.Client(timeout=30) as client:
+        for start in range(0, max_papers, batch_size):
+            response = client.get(api_url, params=search_params(query, batch_size, start))
+            response.raise_for_status()
+            papers = parse_feed(response.content)
+            # ISO-8601 timestamps compare correctly as strings.
+            fresh = [p for p in papers if watermark is None or (p.published or "") > watermark]
+            added += index.add_papers(fresh)
+            for paper in fresh:
+                if paper.published and (newest is None or paper.published > newest):
+                    newest = paper.published
+            if len(fresh) < len(papers) or len(papers) < batch_size:
+                break
+            time.sleep(delay)  # arXiv asks API clients to wait between requests
+    if newest is not None:
+        index.set_last_published(query, newest)
+    return added
+
+
+def main():
+    from config import ARXIV_API_URL, ARXIV_INDEX_PATH
+
+    parser = argparse.ArgumentParser(description="Maintain the local arXiv metadata index.")
+    parser.add_argument("--index", default=ARXIV_INDEX_PATH)
+    commands = parser.add_subparsers(dest="command", required=True)
+    sync_cmd = commands.add_parser("sync", help="incrementally fetch a query from the arXiv API")
+    sync_cmd.add_argument("query")
+    sync_cmd.add_argument("--batch", type=int, default=100)
+    sync_cmd.add_argument("--max", type=int, default=1000)
+    sync_cmd.add_argument("--delay", type=float, default=3.0)
+    load_cmd = commands.add_parser("load", help="load saved arXiv Atom feed files")
+    load_cmd.add_argument("files", nargs="+")
+    args = parser.parse_args()
+
+    index = ArxivIndex(args.index)
+    if args.command == "sync":
+        added = sync(index, ARXIV_API_URL, args.query, args.batch, args.max, args.delay)
+    else:
+        added = 0
+        for name in args.files:
+            with open(name, "rb") as f:
+                added += index.add_papers(parse_feed(f.read()))
+    print(f"Indexed {added} papers ({index.count()} total) in {args.index}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+
+from utils import fast_json
+
+
+class CacheBackend(ABC):
+    """Key-value storage with per-entry TTLs, behind QueryCache and SessionStore.
+
+    Values must be JSON-serializable (records via utils.fast_json); backends
+    that store JSON hand them back as plain dicts. Every set() gives the entry
+    a new version, which compare_and_set() checks before overwriting it.
+    """
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Any]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_versioned(self, key: str) -> Optional[Tuple[Any, int]]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def set(self, key: str, value: Any, ttl_seconds: float):
+        raise NotImplementedError
+
+    @abstractmethod
+    def compare_and_set(self, key: str, value: Any, ttl_seconds: float, version: int) -> bool:
+        """Stores `value` only if the live entry still has `version`; False if it changed, expired or was deleted."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def delete(self, key: str):
+        raise NotImplementedError
+
+    @abstractmethod
+    def size(self) -> int:
+        raise NotImplementedError
+
+
+class MemoryBackend(CacheBackend):
+    """Per-process LRU store."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._version = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self.get_versioned(key)
+        return None if entry is None else entry[0]
+
+    def get_versioned(self, key: str) -> Optional[Tuple[Any, int]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value, version = entry
+        if time.time() >= expires_at:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value, version
+
+    def set(self, key: str, value: Any, ttl_seconds: float):
+        self._version += 1
+        self._entries[key] = (time.time() + ttl_seconds, value, self._version)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def compare_and_set(self, key: str, value: Any, ttl_seconds: float, version: int) -> bool:
+        entry = self.get_versioned(key)
+        if entry is None or entry[1] != version:
+            return False
+        self.set(key, value, ttl_seconds)
+        return True
+
+    def delete(self, key: str):
+        self._entries.pop(key, None)
+
+    def size(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteBackend(CacheBackend):
+    """Store in a local SQLite file, shared by every uvicorn worker on the host."""
+
+    def __init__(self, path: str, max_entries: int, table: str = "query_cache"):
+        self.max_entries = max_entries
+        self.table = table
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=5)
+        self._db.executescript(
+            f"""
+            PRAGMA journal_mode = WAL;
+            CREATE TABLE IF NOT EXISTS {table} (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                last_access REAL NOT NULL,
+                version INTEGER NOT NULL DEFAULT 0
+            );
+            """
+        )
+        columns = [row[1] for row in self._db.execute(f"PRAGMA table_info({table})")]
+        if "version" not in columns:
+            # Tables created before entries were versioned.
+            self._db.execute(f"ALTER TABLE {table} ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+        self._db.commit()
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self.get_versioned(key)
+        return None if entry is None else entry[0]
+
+    def get_versioned(self, key: str) -> Optional[Tuple[Any, int]]:
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                f"SELECT value, version FROM {self.table} WHERE key = ? AND expires_at > ?", (key, now)
+            ).fetchone()
+            if row is None:
+                return None
+            self._db.execute(f"UPDATE {self.table} SET last_access = ? WHERE key = ?", (now, key))
+            self._db.commit()
+        return fast_json.loads(row[0]), row[1]
+
+    def set(self, key: str, value: Any, ttl_seconds: float):
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                f"""
+                INSERT INTO {self.table} (key, value, expires_at, last_access) VALUES (?, ?, ?, ?)
+                ON CONFLICT (key) DO UPDATE SET value = excluded.value, expires_at = excluded.expires_at,
+                    last_access = excluded.last_access, version = version + 1
+                """,
+                (key, fast_json.dumps(value).decode("utf-8"), now + ttl_seconds, now),
+            )
+            self._db.execute(f"DELETE FROM {self.table} WHERE expires_at <= ?", (now,))
+            self._db.execute(
+                f"""
+                DELETE FROM {self.table} WHERE key IN (
+                    SELECT key FROM {self.table} ORDER BY last_access DESC LIMIT -1 OFFSET ?
+                )
+                """,
+                (self.max_entries,),
+            )
+            self._db.commit()
+
+    def compare_and_set(self, key: str, value: Any, ttl_seconds: float, version: int) -> bool:
+        now = time.time()
+        with self._lock:
+            # One UPDATE, so a write from another worker cannot land between the check and the store.
+            cursor = self._db.execute(
+                f"""
+                UPDATE {self.table} SET value = ?, expires_at = ?, last_access = ?, version = version + 1
+                WHERE key = ? AND version = ? AND expires_at > ?
+                """,
+                (fast_json.dumps(value).decode("utf-8"), now + ttl_seconds, now, key, version, now),
+            )
+            self._db.commit()
+            return cursor.rowcount == 1
+
+    def delete(self, key: str):
+        with self._lock:
+            self._db.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+            self._db.commit()
+
+    def size(self) -> int:
+        with self._lock:
+            return self._db.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
@@ -0,0 +1,65 @@
+import re
+from typing import List
+
+from utils.tokens import count_tokens
+
+# Numbered headings ("3 Method", "4.2 Results") and the usual unnumbered ones.
+SECTION_HEADING = re.compile(
+    r"^\s*(?:(?:\d+(?:\.\d+)*|[IVX]+)\.?\s+[A-Z][^\n]{0,80}"
+    r"|(?:abstract|introduction|related work|background|methods?|methodology|experiments?|results|"
+    r"discussion|conclusions?|limitations|acknowledge?ments|references|appendix)\b[^\n]{0,40})$",
+    re.IGNORECASE | re.MULTILINE,
+)
+SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+def split_sections(text: str) -> List[str]:
+    """Splits paper text at lines that look like section headings."""
+    starts = [m.start() for m in SECTION_HEADING.finditer(text)]
+    if not starts or starts[0] != 0:
+        starts.insert(0, 0)
+    bounds = starts + [len(text)]
+    return [text[a:b].strip() for a, b in zip(bounds, bounds[1:]) if text[a:b].strip()]
+
+
+def _split_oversized(section: str, max_tokens: int) -> List[str]:
+    # Prefer line boundaries, then sentence boundaries, then a hard cut.
+    pieces = section.split("\n")
+    if len(pieces) == 1:
+        pieces = SENTENCE_END.split(section)
+    if len(pieces) == 1:
+        step = max_tokens * 4
+        return [section[i:i + step] for i in range(0, len(section), step)]
+    return pack(pieces, max_tokens, "\n" if "\n" in section else " ")
+
+
+def pack(pieces: List[str], max_tokens: int, separator: str = "\n\n") -> List[str]:
+    """Greedily packs consecutive pieces into chunks of at most `max_tokens`."""
+    chunks: List[str] = []
+    current: List[str] = []
+    current_tokens = 0
+    for piece in pieces:
+        tokens = count_tokens(piece)
+        if tokens > max_tokens:
+            if current:
+                chunks.append(separator.join(current))
+                current, current_tokens = [], 0
+            chunks.extend(_split_oversized(piece, max_tokens))
+            continue
+        if current and current_tokens + tokens > max_tokens:
+            chunks.append(separator.join(current))
+            current, current_tokens = [], 0
+        current.append(piece)
+        current_tokens += tokens
+    if current:
+        chunks.append(separator.join(current))
+    return chunks
+
+
+def chunk_paper(text: str, max_tokens: int) -> List[str]:
+    """Section-aware chunks of `text`, each within `max_tokens`.
+
+    Small sections are merged with their neighbours and oversized ones are split
+    on line or sentence boundaries, so chunks rarely cut through a paragraph.
+    """
+    return pack(split_sections(text), max_tokens)
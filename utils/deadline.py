@@ -0,0 +1,68 @@
+import asyncio
+import time
+from typing import Optional
+
+# Seconds the caller is still willing to wait, relative so client and server clocks need not agree.
+DEADLINE_HEADER = "X-Request-Timeout"
+
+
+def parse_deadline(value: Optional[str]) -> Optional[float]:
+    """Absolute monotonic deadline from a DEADLINE_HEADER value, or None if absent or invalid."""
+    if not value:
+        return None
+    try:
+        remaining = float(value)
+    except ValueError:
+        return None
+    return time.monotonic() + max(remaining, 0.0)
+
+
+class DeadlineMiddleware:
+    """Stops work the caller has given up on.
+
+    If the response has not started by the time the caller's deadline passes,
+    the request is cancelled and answered with 504. Once a (streaming) response
+    has started, the client decides how long to keep reading.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        header = DEADLINE_HEADER.lower().encode("latin-1")
+        deadline = parse_deadline(next((v.decode("latin-1") for k, v in scope["headers"] if k == header), None))
+        if deadline is None:
+            await self.app(scope, receive, send)
+            return
+
+        started = asyncio.Event()
+
+        async def send_and_mark(message):
+            if message["type"] == "http.response.start":
+                started.set()
+            await send(message)
+
+        task = asyncio.ensure_future(self.app(scope, receive, send_and_mark))
+        waiter = asyncio.ensure_future(started.wait())
+        try:
+            await asyncio.wait({task, waiter}, timeout=deadline - time.monotonic(), return_when=asyncio.FIRST_COMPLETED)
+        except asyncio.CancelledError:
+            task.cancel()
+            raise
+        finally:
+            waiter.cancel()
+        if task.done() or started.is_set():
+            await task
+            return
+
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        await send({"type": "http.response.start", "status": 504,
+                    "headers": [(b"content-type", b"application/json")]})
+        await send({"type": "http.response.body", "body": b'{"detail":"Request deadline exceeded."}'})
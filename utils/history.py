@@ -0,0 +1,161 @@
+from typing import Any, Dict, List
+
+from utils.tokens import count_tokens
+
+# Approximate per-message framing overhead added by chat completion APIs.
+MESSAGE_OVERHEAD_TOKENS = 4
+# Compaction shrinks the history to this share of the budget, so it runs rarely
+# and the kept prefix stays byte-identical between compactions (prompt caching).
+LOW_WATER_RATIO = 0.6
+# The rolling summary keeps its newest notes within this share of the budget.
+SUMMARY_BUDGET_RATIO = 0.2
+ROLLING_SUMMARY_PREFIX = "Summary of the earlier conversation:"
+ELIDED_PREFIX = "[Earlier "
+
+
+def message_tokens(message: Dict[str, Any]) -> int:
+    tokens = MESSAGE_OVERHEAD_TOKENS + count_tokens(message.get("content") or "")
+    for tool_call in message.get("tool_calls") or []:
+        function = tool_call["function"]
+        tokens += count_tokens(function.get("name") or "") + count_tokens(function.get("arguments") or "")
+    return tokens
+
+
+def _first_line(text: str, limit: int = 120) -> str:
+    line = text.strip().split("\n", 1)[0]
+    return line if len(line) <= limit else line[:limit] + "..."
+
+
+class ConversationHistory:
+    """Chat history that keeps the prompt sent to the LLM within a token budget.
+
+    The system prompt and the last `keep_recent_turns` user turns are always
+    kept verbatim. When a new turn would start over budget, older tool outputs
+    are replaced by one-line references; if that is not enough, the oldest
+    turns are folded into a rolling summary message after the system prompt.
+    While the kept turns alone are above the low-water mark, older turns are
+    folded in batches rather than one per turn, so the summary changes rarely.
+    """
+
+    def __init__(self, max_tokens: int, keep_recent_turns: int):
+        self.max_tokens = max_tokens
+        self.keep_recent_turns = keep_recent_turns
+        self.messages: List[Dict[str, Any]] = []
+        self._tokens: List[int] = []
+        self.compactions = 0
+
+    @property
+    def total_tokens(self) -> int:
+        return sum(self._tokens)
+
+    def append(self, message: Dict[str, Any]):
+        # Compact only at turn boundaries so the turn in progress is never rewritten.
+        if message.get("role") == "user" and self.total_tokens + message_tokens(message) > self.max_tokens:
+            self._compact()
+        self.messages.append(message)
+        self._tokens.append(message_tokens(message))
+
+    def pop(self) -> Dict[str, Any]:
+        self._tokens.pop()
+        return self.messages.pop()
+
+    def __len__(self) -> int:
+        return len(self.messages)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"messages": self.messages, "tokens": self._tokens, "compactions": self.compactions}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], max_tokens: int, keep_recent_turns: int) -> "ConversationHistory":
+        """Restores a history saved with to_dict, as is (no compaction until the next user turn)."""
+        history = cls(max_tokens, keep_recent_turns)
+        history.messages = list(data["messages"])
+        tokens = data.get("tokens")
+        # Saved counts spare re-tokenizing the whole history on every turn.
+        history._tokens = list(tokens) if tokens and len(tokens) == len(history.messages) else [
+            message_tokens(m) for m in history.messages
+        ]
+        history.compactions = data.get("compactions", 0)
+        return history
+
+    def __iter__(self):
+        return iter(self.messages)
+
+    def _turn_starts(self) -> List[int]:
+        return [i for i, m in enumerate(self.messages) if m.get("role") == "user"]
+
+    def _replace(self, index: int, message: Dict[str, Any]):
+        self.messages[index] = message
+        self._tokens[index] = message_tokens(message)
+
+    def _compact(self):
+        target = int(self.max_tokens * LOW_WATER_RATIO)
+        turn_starts = self._turn_starts()
+        if len(turn_starts) <= self.keep_recent_turns:
+            return
+        protected_from = turn_starts[-self.keep_recent_turns] if self.keep_recent_turns else len(self.messages)
+        older_tokens = sum(self._tokens[turn_starts[0]:protected_from])
+        if self.total_tokens - older_tokens > target and older_tokens < self.max_tokens - target:
+            # The kept recent turns alone are over the target, so no compaction reaches it. Rather than
+            # rewrite the summary on every turn, wait until the older turns free as much as a normal one.
+            return
+        self.compactions += 1
+
+        # 1. Elide old tool outputs, oldest first. The tool message itself stays so call/result pairs remain valid.
+        for i in range(protected_from):
+            if self.total_tokens <= target:
+                return
+            message = self.messages[i]
+            content = message.get("content") or ""
+            if message.get("role") == "tool" and not content.startswith(ELIDED_PREFIX):
+                reference = (
+                    f"{ELIDED_PREFIX}{message.get('name', 'tool')} output elided ({self._tokens[i]} tokens). "
+                    f"It began: {_first_line(content)}]"
+                )
+                # Short outputs ("No papers found ...") are cheaper than their reference.
+                if count_tokens(reference) < count_tokens(content):
+                    self._replace(i, {**message, "content": reference})
+
+        # 2. Fold whole old turns into the rolling summary until under target.
+        while self.total_tokens > target:
+            turn_starts = self._turn_starts()
+            if len(turn_starts) <= max(self.keep_recent_turns, 1):
+                return
+            start, end = turn_starts[0], turn_starts[1]
+            self._fold_into_summary(start, end)
+
+    def _fold_into_summary(self, start: int, end: int):
+        notes = []
+        for message in self.messages[start:end]:
+            role = message.get("role")
+            if role == "user":
+                notes.append(f"- User asked: {_first_line(message.get('content') or '')}")
+            elif role == "assistant":
+                for tool_call in message.get("tool_calls") or []:
+                    function = tool_call["function"]
+                    notes.append(f"- Assistant called {function.get('name')}({function.get('arguments')})")
+                if message.get("content"):
+                    notes.append(f"- Assistant replied: {_first_line(message['content'])}")
+
+        summary_index = 1 if self.messages and self.messages[0].get("role") == "system" else 0
+        existing = self.messages[summary_index] if summary_index < len(self.messages) else None
+        has_summary = (
+            existing is not None
+            and existing.get("role") == "system"
+            and (existing.get("content") or "").startswith(ROLLING_SUMMARY_PREFIX)
+        )
+
+        if has_summary:
+            notes = existing["content"].split("\n")[1:] + notes
+        summary_budget = int(self.max_tokens * SUMMARY_BUDGET_RATIO)
+        while len(notes) > 1 and count_tokens("\n".join(notes)) > summary_budget:
+            notes.pop(0)
+        summary = {"role": "system", "content": ROLLING_SUMMARY_PREFIX + "\n" + "\n".join(notes)}
+
+        del self.messages[start:end]
+        del self._tokens[start:end]
+        if has_summary:
+            self._replace(summary_index, summary)
+        else:
+            self.messages.insert(summary_index, summary)
+            self._tokens.insert(summary_index, message_tokens(summary))
@@ -0,0 +1,71 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+
+class AsyncHTTPPool:
+    """Shared keep-alive httpx client with global and per-host concurrency caps."""
+
+    def __init__(
+        self,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        max_per_host: int = 10,
+        keepalive_expiry: float = 30.0,
+        timeout: float = 10.0,
+    ):
+        self.max_connections = max_connections
+        self.max_per_host = max_per_host
+        self._limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self._timeout = httpx.Timeout(timeout)
+        self._client: Optional[httpx.AsyncClient] = None
+        self._global_slots: Optional[asyncio.Semaphore] = None
+        self._host_slots: Dict[str, asyncio.Semaphore] = {}
+
+    async def start(self):
+        if self._client is None:
+            self._client = httpx.AsyncClient(limits=self._limits, timeout=self._timeout)
+            self._global_slots = asyncio.Semaphore(self.max_connections)
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            self._host_slots.clear()
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            raise RuntimeError("AsyncHTTPPool used before start() was awaited.")
+        return self._client
+
+    def _slots_for(self, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).netloc
+        slots = self._host_slots.get(host)
+        if slots is None:
+            slots = self._host_slots[host] = asyncio.Semaphore(self.max_per_host)
+        return slots
+
+    @asynccontextmanager
+    async def slot(self, url: str):
+        # httpx only caps connections globally, so the per-host cap is enforced here.
+        async with self._global_slots, self._slots_for(url):
+            yield self.client
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        async with self.slot(url) as client:
+            return await client.get(url, **kwargs)
+
+    @asynccontextmanager
+    async def stream(self, method: str, url: str, **kwargs):
+        """Streams a response body; the host slot is held until the body is consumed."""
+        async with self.slot(url) as client:
+            async with client.stream(method, url, **kwargs) as response:
+                yield response
@@ -1,15 +1,34 @@
 import time
 from datetime import datetime
 
+from utils.metrics import REGISTRY
+
+TOOL_CALL_SECONDS = REGISTRY.histogram(
+    "scout_tool_call_duration_seconds", "Tool call latency as seen by the chat agent.", ("tool", "outcome")
+)
+
+_stdout_enabled = True
+
+def configure_logging(stdout: bool):
+    """Turns the per-call stdout banner on or off; metrics are recorded either way."""
+    global _stdout_enabled
+    _stdout_enabled = stdout
+
 def log_tool_call(tool_name: str, args: dict, latency: float, outcome: str):
+    TOOL_CALL_SECONDS.observe(latency, tool=tool_name, outcome=outcome)
+    if not _stdout_enabled:
+        return
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    print(f"\n--- TOOL CALL LOG ---")
-    print(f"Timestamp: {timestamp}")
-    print(f"Tool Name: {tool_name}")
-    print(f"Arguments: {args}")
-    print(f"Latency: {latency:.4f} seconds")
-    print(f"Outcome: {outcome}")
-    print(f"---------------------\n")
+    # Single print so banners from concurrent tool calls do not interleave line by line.
+    print(
+        f"\n--- TOOL CALL LOG ---\n"
+        f"Timestamp: {timestamp}\n"
+        f"Tool Name: {tool_name}\n"
+        f"Arguments: {args}\n"
+        f"Latency: {latency:.4f} seconds\n"
+        f"Outcome: {outcome}\n"
+        f"---------------------\n"
+    )
 
 def print_streaming_response(chunk: str):
     print(chunk, end="", flush=True)
\ No newline at end of file
@@ -0,0 +1,219 @@
+"""Minimal Prometheus-style metrics: counters, histograms and timing spans.
+
+Each process keeps one registry; the FastAPI apps serve it at /metrics via
+`instrument_app()`.
+"""
+import bisect
+import threading
+import time
+from typing import Dict, List, Sequence, Tuple
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+BYTES_BUCKETS = (1e4, 1e5, 5e5, 1e6, 5e6, 1e7, 5e7, 1e8)
+COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 5000)
+TOKEN_BUCKETS = (10, 50, 100, 250, 500, 1000, 2000, 4000, 8000, 16000, 32000)
+
+LabelValues = Tuple[str, ...]
+
+
+def _format_labels(names: Sequence[str], values: LabelValues, extra: str = "") -> str:
+    pairs = [f'{n}="{"" if v is None else v}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _sort_key(item) -> Tuple[str, ...]:
+    return tuple(map(str, item[0]))
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels: str):
+        key = tuple(map(labels.get, self.labelnames))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items(), key=_sort_key):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # Per label set: [count per bucket (non-cumulative, last is +Inf), sum, count]
+        self._series: Dict[LabelValues, list] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values: str) -> "BoundHistogram":
+        """Series for fixed label values; observing through it skips the per-call label lookup."""
+        key = tuple(values)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        return BoundHistogram(self, series)
+
+    def observe(self, value: float, **labels: str):
+        # Label values are used as given (unset ones render empty) and converted only in render().
+        key = tuple(map(labels.get, self.labelnames))
+        series = self._series.get(key)
+        if series is None:
+            self.labels(*key)
+            series = self._series[key]
+        _observe(self, series, value)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, (counts, total, count) in sorted(self._series.items(), key=_sort_key):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                    cumulative += bucket_count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    le_label = f'le="{le}"'
+                    lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le_label)} {cumulative}")
+                lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {total}")
+                lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+def _observe(histogram: Histogram, series: list, value: float):
+    index = bisect.bisect_left(histogram.buckets, value)
+    with histogram._lock:
+        series[0][index] += 1
+        series[1] += value
+        series[2] += 1
+
+
+class BoundHistogram:
+    __slots__ = ("histogram", "series")
+
+    def __init__(self, histogram: Histogram, series: list):
+        self.histogram = histogram
+        self.series = series
+
+    def observe(self, value: float):
+        _observe(self.histogram, self.series, value)
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, name: str, factory):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = factory()
+            return metric
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._get_or_create(name, lambda: Counter(name, help_text, labelnames))
+
+    def histogram(
+        self, name: str, help_text: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS
+    ) -> Histogram:
+        return self._get_or_create(name, lambda: Histogram(name, help_text, labelnames, buckets))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    "scout_stage_duration_seconds", "Time spent in each pipeline stage.", ("component", "stage")
+)
+
+_stage_series: Dict[Tuple[str, str], BoundHistogram] = {}
+
+
+class span:
+    """Times a block into scout_stage_duration_seconds{component, stage}; works in sync and async code."""
+
+    __slots__ = ("series", "start")
+
+    def __init__(self, component: str, stage: str):
+        key = (component, stage)
+        series = _stage_series.get(key)
+        if series is None:
+            series = _stage_series[key] = STAGE_SECONDS.labels(component, stage)
+        self.series = series
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.series.observe(time.perf_counter() - self.start)
+        return False
+
+
+REQUEST_SECONDS = REGISTRY.histogram(
+    "scout_http_request_duration_seconds", "HTTP request latency per endpoint.", ("component", "path", "status")
+)
+
+
+class RequestLatencyMiddleware:
+    """Plain ASGI middleware (cheaper than BaseHTTPMiddleware) feeding scout_http_request_duration_seconds."""
+
+    def __init__(self, app, component: str):
+        self.app = app
+        self.component = component
+        self._series: Dict[Tuple[str, str], BoundHistogram] = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+        status = "500"
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            # The route template, so /sessions/{session_id} is one series rather than one per session.
+            key = (getattr(scope.get("route"), "path", scope["path"]), status)
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = REQUEST_SECONDS.labels(self.component, *key)
+            series.observe(elapsed)
+
+
+def instrument_app(app, component: str):
+    """Adds request latency tracking and a GET /metrics endpoint to a FastAPI app."""
+    from fastapi.responses import PlainTextResponse
+
+    app.add_middleware(RequestLatencyMiddleware, component=component)
+
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics():
+        return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
@@ -0,0 +1,221 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+ARXIV_HOSTS = {"arxiv.org", "www.arxiv.org", "export.arxiv.org"}
+
+
+def normalize_url(url: str) -> str:
+    """Canonical form of a PDF URL so trivially different spellings share a cache entry."""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower() or "http"
+    host = (parts.hostname or "").lower()
+    port = parts.port
+    path = parts.path or "/"
+
+    if host in ARXIV_HOSTS:
+        # arxiv.org/pdf/<id>, arxiv.org/pdf/<id>.pdf and export.arxiv.org all serve the same file.
+        scheme, host, port = "https", "arxiv.org", None
+        if path.endswith(".pdf"):
+            path = path[:-4]
+
+    netloc = host
+    if port and not ((scheme == "http" and port == 80) or (scheme == "https" and port == 443)):
+        netloc = f"{host}:{port}"
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((scheme, netloc, path, query, ""))
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+@dataclass
+class CachedText:
+    text: str
+    content_hash: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    fresh: bool
+    complete: bool
+
+    def covers(self, max_chars: Optional[int]) -> bool:
+        """True if this entry holds enough text for a caller needing `max_chars` (None = all)."""
+        return self.complete or (max_chars is not None and len(self.text) >= max_chars)
+
+    def conditional_headers(self) -> Dict[str, str]:
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class PDFTextCache:
+    """Persistent cache of extracted PDF text.
+
+    Text is stored once per content hash under `cache_dir`; a SQLite index maps
+    normalized URLs to hashes along with their ETag/Last-Modified validators.
+    Total stored text is bounded by `max_bytes` with least-recently-used eviction.
+    Entries may hold only the leading pages of a document (`complete` False)
+    when extraction stopped early at a text budget.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int, fresh_seconds: float):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.fresh_seconds = fresh_seconds
+        self.stats_counters = {"hits": 0, "misses": 0, "revalidated": 0, "hash_hits": 0, "evictions": 0}
+
+        os.makedirs(os.path.join(cache_dir, "texts"), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(os.path.join(cache_dir, "index.sqlite3"), check_same_thread=False)
+        self._db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS urls (
+                url TEXT PRIMARY KEY,
+                content_hash TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                validated_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS texts (
+                content_hash TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                last_access REAL NOT NULL,
+                complete INTEGER NOT NULL DEFAULT 1
+            );
+            CREATE INDEX IF NOT EXISTS texts_last_access ON texts (last_access);
+            """
+        )
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(texts)")}
+        if "complete" not in columns:
+            self._db.execute("ALTER TABLE texts ADD COLUMN complete INTEGER NOT NULL DEFAULT 1")
+        self._db.commit()
+
+    def _text_path(self, digest: str) -> str:
+        return os.path.join(self.cache_dir, "texts", digest[:2], f"{digest}.txt")
+
+    def _read_text(self, digest: str) -> Optional[Tuple[str, bool]]:
+        row = self._db.execute("SELECT complete FROM texts WHERE content_hash = ?", (digest,)).fetchone()
+        if row is None:
+            return None
+        try:
+            with open(self._text_path(digest), "r", encoding="utf-8") as f:
+                text = f.read()
+        except FileNotFoundError:
+            self._db.execute("DELETE FROM texts WHERE content_hash = ?", (digest,))
+            return None
+        self._db.execute("UPDATE texts SET last_access = ? WHERE content_hash = ?", (time.time(), digest))
+        return text, bool(row[0])
+
+    def lookup(self, url: str) -> Optional[CachedText]:
+        """Returns the cached text for `url`, flagged fresh if it needs no revalidation."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT content_hash, etag, last_modified, validated_at FROM urls WHERE url = ?",
+                (normalize_url(url),),
+            ).fetchone()
+            if row is None:
+                return None
+            digest, etag, last_modified, validated_at = row
+            stored = self._read_text(digest)
+            self._db.commit()
+            if stored is None:
+                return None
+            fresh = time.time() - validated_at < self.fresh_seconds
+            return CachedText(stored[0], digest, etag, last_modified, fresh, stored[1])
+
+    def get_by_hash(self, digest: str, max_chars: Optional[int] = None) -> Optional[Tuple[str, bool]]:
+        """Returns (text, complete) already extracted from identical PDF bytes, if it covers `max_chars`."""
+        with self._lock:
+            stored = self._read_text(digest)
+            self._db.commit()
+        if stored is None:
+            return None
+        text, complete = stored
+        if not complete and (max_chars is None or len(text) < max_chars):
+            return None
+        self.count("hash_hits")
+        return text, complete
+
+    def mark_validated(self, url: str):
+        with self._lock:
+            self._db.execute("UPDATE urls SET validated_at = ? WHERE url = ?", (time.time(), normalize_url(url)))
+            self._db.commit()
+
+    def store(
+        self,
+        url: str,
+        digest: str,
+        text: str,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+        complete: bool = True,
+    ):
+        data = text.encode("utf-8")
+        path = self._text_path(digest)
+        now = time.time()
+        with self._lock:
+            existing = self._db.execute(
+                "SELECT size, complete FROM texts WHERE content_hash = ?", (digest,)
+            ).fetchone()
+            # Never replace stored text with a shorter, partial extraction of the same bytes.
+            keep_existing = existing is not None and os.path.exists(path) and (
+                existing[1] or (not complete and existing[0] >= len(data))
+            )
+            if keep_existing:
+                self._db.execute("UPDATE texts SET last_access = ? WHERE content_hash = ?", (now, digest))
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tmp_path = f"{path}.{os.getpid()}.tmp"
+                with open(tmp_path, "wb") as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+                self._db.execute(
+                    "INSERT OR REPLACE INTO texts (content_hash, size, last_access, complete) VALUES (?, ?, ?, ?)",
+                    (digest, len(data), now, int(complete)),
+                )
+            self._db.execute(
+                "INSERT OR REPLACE INTO urls (url, content_hash, etag, last_modified, validated_at) VALUES (?, ?, ?, ?, ?)",
+                (normalize_url(url), digest, etag, last_modified, now),
+            )
+            self._evict()
+            self._db.commit()
+
+    def _evict(self):
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM texts").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for digest, size in self._db.execute("SELECT content_hash, size FROM texts ORDER BY last_access").fetchall():
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(self._text_path(digest))
+            except FileNotFoundError:
+                pass
+            self._db.execute("DELETE FROM texts WHERE content_hash = ?", (digest,))
+            self._db.execute("DELETE FROM urls WHERE content_hash = ?", (digest,))
+            total -= size
+            self.count("evictions")
+
+    def count(self, counter: str):
+        self.stats_counters[counter] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries, total = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM texts").fetchone()
+        lookups = self.stats_counters["hits"] + self.stats_counters["misses"]
+        return {
+            **self.stats_counters,
+            "entries": entries,
+            "bytes": total,
+            "max_bytes": self.max_bytes,
+            "hit_ratio": self.stats_counters["hits"] / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,131 @@
+import asyncio
+import io
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple, Union
+
+from PyPDF2 import PdfReader
+
+from utils.metrics import REGISTRY, COUNT_BUCKETS
+
+PAGES_EXTRACTED = REGISTRY.histogram(
+    "scout_pdf_pages_extracted", "Pages parsed per extraction, by whether the whole PDF was read.",
+    ("complete",), buckets=COUNT_BUCKETS,
+)
+
+
+class ExtractionPoolBusy(Exception):
+    """Raised when the extraction queue is full and the caller should retry later."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"PDF extraction queue is full, retry after {retry_after}s.")
+        self.retry_after = retry_after
+
+
+PDFSource = Union[bytes, str]
+
+
+def _open(source: PDFSource) -> PdfReader:
+    # A path is opened by the worker itself, so large PDFs are never pickled across processes.
+    return PdfReader(source if isinstance(source, str) else io.BytesIO(source))
+
+
+def _pages_text(reader: PdfReader, start: int, end: int) -> str:
+    # Handle pages with no extractable text
+    return "".join(reader.pages[i].extract_text() or "" for i in range(start, end))
+
+
+def extract_first_range(source: PDFSource, pages_per_task: int) -> Tuple[int, str]:
+    """Worker entry point: returns the page count and the text of the first page range."""
+    reader = _open(source)
+    num_pages = len(reader.pages)
+    return num_pages, _pages_text(reader, 0, min(pages_per_task, num_pages))
+
+
+def extract_page_range(source: PDFSource, start: int, end: int) -> str:
+    """Worker entry point: returns the text of pages [start, end)."""
+    return _pages_text(_open(source), start, end)
+
+
+class PDFExtractionPool:
+    """Bounded process pool that extracts PDF text in parallel page ranges.
+
+    At most `queue_depth` documents are admitted at once; further requests get
+    ExtractionPoolBusy instead of queueing without limit. Background extractions
+    (prefetches) run apart from these, on one extra worker process, one page
+    range at a time, so they never hold a foreground worker and stop after the
+    current range once cancelled.
+    """
+
+    def __init__(self, workers: int, queue_depth: int, pages_per_task: int, retry_after: int):
+        self.workers = workers
+        self.queue_depth = queue_depth
+        self.pages_per_task = pages_per_task
+        self.retry_after = retry_after
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._background_executor: Optional[ProcessPoolExecutor] = None
+        self._admitted = 0
+
+    def start(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            # Processes are spawned on first use, so this costs nothing while prefetching is off.
+            self._background_executor = ProcessPoolExecutor(max_workers=1)
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._background_executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+            self._background_executor = None
+
+    async def extract(
+        self, source: PDFSource, max_chars: Optional[int] = None, background: bool = False,
+    ) -> Tuple[str, bool]:
+        """Extracts text from `source`, returning (text, complete).
+
+        With `max_chars`, page ranges are scheduled one wave of `workers` ranges
+        at a time and extraction stops once the budget is met, so only the
+        leading pages of a long paper are parsed; `complete` is then False.
+        `background` extractions use the separate prefetch worker and are not
+        counted against `queue_depth`.
+        """
+        if self._executor is None:
+            raise RuntimeError("PDFExtractionPool used before start() was called.")
+        if background:
+            return await self._extract(self._background_executor, source, max_chars, wave_size=1)
+        if self._admitted >= self.queue_depth:
+            raise ExtractionPoolBusy(self.retry_after)
+
+        self._admitted += 1
+        try:
+            return await self._extract(self._executor, source, max_chars, self.workers if max_chars is not None else None)
+        finally:
+            self._admitted -= 1
+
+    async def _extract(
+        self, executor: ProcessPoolExecutor, source: PDFSource, max_chars: Optional[int], wave_size: Optional[int],
+    ) -> Tuple[str, bool]:
+        # wave_size None submits every remaining page range at once.
+        loop = asyncio.get_running_loop()
+        num_pages, first_text = await loop.run_in_executor(executor, extract_first_range, source, self.pages_per_task)
+        parts: List[str] = [first_text]
+        extracted = len(first_text)
+        pages = min(self.pages_per_task, num_pages)
+        starts = list(range(self.pages_per_task, num_pages, self.pages_per_task))
+        wave_size = wave_size or len(starts)
+
+        # Cancellation lands between waves, so nothing further is submitted once the caller gives up.
+        while starts and (max_chars is None or extracted < max_chars):
+            wave, starts = starts[:wave_size], starts[wave_size:]
+            texts = await asyncio.gather(*(
+                loop.run_in_executor(
+                    executor, extract_page_range, source, start, min(start + self.pages_per_task, num_pages)
+                )
+                for start in wave
+            ))
+            parts.extend(texts)
+            extracted += sum(len(text) for text in texts)
+            pages += sum(min(self.pages_per_task, num_pages - start) for start in wave)
+
+        PAGES_EXTRACTED.observe(pages, complete=str(not starts).lower())
+        return "".join(parts), not starts
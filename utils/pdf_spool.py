@@ -0,0 +1,77 @@
+import hashlib
+import os
+import tempfile
+from typing import Optional, Union
+
+import httpx
+
+
+class PDFTooLarge(Exception):
+    """Raised when a PDF exceeds the configured download cap."""
+
+    def __init__(self, max_bytes: int):
+        super().__init__(f"PDF exceeds the maximum download size of {max_bytes} bytes.")
+        self.max_bytes = max_bytes
+
+
+class SpooledPDF:
+    """Downloaded PDF body, held in memory when small and in a temp file otherwise.
+
+    `source` is what the extraction workers receive: raw bytes, or a file path
+    they open themselves so large bodies are never copied between processes.
+    """
+
+    def __init__(self, data: Optional[bytes], path: Optional[str], digest: str, size: int):
+        self._data = data
+        self.path = path
+        self.digest = digest
+        self.size = size
+
+    @property
+    def source(self) -> Union[bytes, str]:
+        return self.path if self.path is not None else self._data
+
+    def cleanup(self):
+        if self.path is not None:
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+            self.path = None
+        self._data = None
+
+
+async def spool_response(response: httpx.Response, max_bytes: int, spool_threshold: int) -> SpooledPDF:
+    """Reads a streamed response body, hashing it on the fly and enforcing `max_bytes`."""
+    declared = response.headers.get("Content-Length")
+    if declared and declared.isdigit() and int(declared) > max_bytes:
+        raise PDFTooLarge(max_bytes)
+
+    hasher = hashlib.sha256()
+    buffer = bytearray()
+    spool_file = None
+    size = 0
+    try:
+        async for chunk in response.aiter_bytes():
+            size += len(chunk)
+            if size > max_bytes:
+                raise PDFTooLarge(max_bytes)
+            hasher.update(chunk)
+            if spool_file is None:
+                buffer += chunk
+                if len(buffer) > spool_threshold:
+                    spool_file = tempfile.NamedTemporaryFile(prefix="scout-pdf-", suffix=".pdf", delete=False)
+                    spool_file.write(buffer)
+                    buffer = bytearray()
+            else:
+                spool_file.write(chunk)
+    except BaseException:
+        if spool_file is not None:
+            spool_file.close()
+            os.remove(spool_file.name)
+        raise
+
+    if spool_file is not None:
+        spool_file.close()
+        return SpooledPDF(None, spool_file.name, hasher.hexdigest(), size)
+    return SpooledPDF(bytes(buffer), None, hasher.hexdigest(), size)
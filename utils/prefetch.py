@@ -0,0 +1,187 @@
+import asyncio
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from utils.metrics import REGISTRY
+from utils.pdf_cache import normalize_url
+from utils.rate_limit import TokenBucket
+
+PREFETCH_EVENTS = REGISTRY.counter(
+    "scout_pdf_prefetch_events_total",
+    "Speculative PDF prefetches (queued, completed, failed, preempted, cancelled) and foreground hits/misses.",
+    ("event",),
+)
+
+# Remembered prefetched URLs, for hit accounting.
+PREFETCHED_MEMORY = 1024
+
+
+class Prefetcher:
+    """Warms the PDF text cache in the background for URLs a user is likely to ask about next.
+
+    Prefetching only runs while no foreground request is loading a PDF, at most
+    `concurrency` at a time and `per_minute` per minute. A foreground request
+    preempts running prefetches (they go back to the front of the queue), except
+    one for its own URL, which it joins instead of starting over. Queued URLs
+    remember who submitted them (`owner`, e.g. an agent session), so one
+    submitter replacing its queue leaves the others' alone.
+    """
+
+    def __init__(self, load: Callable[[str], Awaitable[Any]], concurrency: int, per_minute: float, max_pending: int):
+        self.load = load
+        self.concurrency = concurrency
+        self.max_pending = max_pending
+        self._bucket = TokenBucket(per_minute) if per_minute else None
+        # normalized URL -> (URL, owner)
+        self._pending: "OrderedDict[str, Tuple[str, Optional[str]]]" = OrderedDict()
+        self._running: Dict[str, asyncio.Task] = {}
+        self._prefetched: "OrderedDict[str, None]" = OrderedDict()
+        self._foreground = 0
+        self._workers: List[asyncio.Task] = []
+        # Created in start() so they belong to the server's event loop.
+        self._idle: Optional[asyncio.Event] = None
+        self._has_work: Optional[asyncio.Event] = None
+        self.stats_counters = {
+            "queued": 0, "completed": 0, "failed": 0, "preempted": 0, "cancelled": 0, "hits": 0, "misses": 0,
+        }
+
+    @property
+    def enabled(self) -> bool:
+        return self.concurrency > 0
+
+    def _count(self, event: str, amount: int = 1):
+        self.stats_counters[event] += amount
+        PREFETCH_EVENTS.inc(amount, event=event)
+
+    def start(self):
+        if not self.enabled or self._workers:
+            return
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._has_work = asyncio.Event()
+        self._workers = [asyncio.ensure_future(self._work()) for _ in range(self.concurrency)]
+
+    async def close(self):
+        self.cancel_all()
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def submit(self, urls: Iterable[str], replace: bool = True, owner: Optional[str] = None) -> int:
+        """Queues URLs for prefetch; `replace` drops what the same owner's earlier submissions left queued.
+
+        Returns the number queued.
+        """
+        if not self.enabled:
+            return 0
+        if replace:
+            replaced = [key for key, (_, queued_by) in self._pending.items() if queued_by == owner]
+            for key in replaced:
+                del self._pending[key]
+            if replaced:
+                self._count("cancelled", len(replaced))
+        queued = 0
+        for url in urls:
+            key = normalize_url(url)
+            if key in self._running or key in self._pending or key in self._prefetched:
+                continue
+            if len(self._pending) >= self.max_pending:
+                break
+            self._pending[key] = (url, owner)
+            queued += 1
+        if queued:
+            self._count("queued", queued)
+        if self._pending:
+            self._has_work.set()
+        return queued
+
+    def cancel_all(self) -> int:
+        """Drops queued prefetches and cancels running ones."""
+        cancelled = len(self._pending) + len(self._running)
+        if not cancelled:
+            return 0
+        self._pending.clear()
+        for task in list(self._running.values()):
+            task.cancel()
+        self._count("cancelled", cancelled)
+        return cancelled
+
+    @asynccontextmanager
+    async def foreground(self, url: str):
+        """Wraps a foreground PDF load: records prefetch hits and keeps prefetching out of its way."""
+        if not self.enabled:
+            yield
+            return
+        key = normalize_url(url)
+        running = self._running.get(key)
+        self._pending.pop(key, None)
+        if running is not None or key in self._prefetched:
+            self._count("hits")
+        else:
+            self._count("misses")
+
+        self._foreground += 1
+        if self._idle is not None:
+            self._idle.clear()
+        for other_key, task in list(self._running.items()):
+            if other_key != key:
+                task.cancel()
+        try:
+            if running is not None:
+                # Nearly done already: wait for it rather than downloading the PDF a second time.
+                await asyncio.wait({running})
+            yield
+        finally:
+            self._foreground -= 1
+            if self._foreground == 0 and self._idle is not None:
+                self._idle.set()
+
+    async def _work(self):
+        while True:
+            await self._has_work.wait()
+            await self._idle.wait()
+            if self._bucket is not None:
+                await self._bucket.acquire(1)
+                await self._idle.wait()
+            if not self._pending:
+                self._has_work.clear()
+                continue
+            key, (url, owner) = self._pending.popitem(last=False)
+            if not self._pending:
+                self._has_work.clear()
+
+            task = asyncio.ensure_future(self.load(url))
+            self._running[key] = task
+            try:
+                await asyncio.wait({task})
+            except asyncio.CancelledError:
+                task.cancel()
+                raise
+            finally:
+                self._running.pop(key, None)
+
+            if task.cancelled():
+                if self._foreground:
+                    # Preempted by a foreground request: retry once the server is idle again.
+                    self._count("preempted")
+                    self._pending[key] = (url, owner)
+                    self._pending.move_to_end(key, last=False)
+                    self._has_work.set()
+            elif task.exception() is not None:
+                self._count("failed")
+            else:
+                self._count("completed")
+                self._prefetched[key] = None
+                while len(self._prefetched) > PREFETCHED_MEMORY:
+                    self._prefetched.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.stats_counters["hits"] + self.stats_counters["misses"]
+        return {
+            **self.stats_counters,
+            "pending": len(self._pending),
+            "running": len(self._running),
+            "hit_rate": self.stats_counters["hits"] / lookups if lookups else 0.0,
+        }
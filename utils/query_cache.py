@@ -0,0 +1,68 @@
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from utils.cache_backends import CacheBackend
+from utils.singleflight import SingleFlight
+
+
+def normalize_query(query: str) -> str:
+    """Case- and whitespace-insensitive form of a search query."""
+    return " ".join(query.lower().split())
+
+
+class QueryCache:
+    """TTL cache of search results keyed by normalized query.
+
+    A cached result for `max_results = n` also answers any request for fewer
+    papers, and concurrent identical misses share one upstream fetch.
+    """
+
+    def __init__(self, backend: CacheBackend, ttl_seconds: float):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self._flight = SingleFlight()
+        self.stats_counters = {"hits": 0, "misses": 0}
+
+    def _lookup(self, query: str, max_results: int) -> Optional[List[Any]]:
+        entry = self.backend.get(normalize_query(query))
+        if entry is None:
+            return None
+        # A result shorter than what was asked for means arXiv had no more matches.
+        exhausted = len(entry["papers"]) < entry["max_results"]
+        if entry["max_results"] >= max_results or exhausted:
+            return entry["papers"][:max_results]
+        return None
+
+    async def get_or_fetch(
+        self, query: str, max_results: int, fetch: Callable[[], Awaitable[List[Any]]]
+    ) -> List[Any]:
+        papers = self._lookup(query, max_results)
+        if papers is not None:
+            self.stats_counters["hits"] += 1
+            return papers
+
+        key = (normalize_query(query), max_results)
+        if not self._flight.in_flight(key):
+            self.stats_counters["misses"] += 1
+
+        async def fetch_and_store() -> List[Any]:
+            result = await fetch()
+            existing = self.backend.get(normalize_query(query))
+            # Keep whichever cached result set is larger, so it keeps serving smaller requests.
+            if existing is None or existing["max_results"] <= max_results:
+                self.backend.set(
+                    normalize_query(query), {"max_results": max_results, "papers": result}, self.ttl_seconds
+                )
+            return result
+
+        return await self._flight.do(key, fetch_and_store)
+
+    def stats(self) -> Dict[str, Any]:
+        hits = self.stats_counters["hits"] + self._flight.coalesced
+        lookups = hits + self.stats_counters["misses"]
+        return {
+            **self.stats_counters,
+            "coalesced": self._flight.coalesced,
+            "entries": self.backend.size(),
+            "ttl_seconds": self.ttl_seconds,
+            "hit_ratio": hits / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,60 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import Optional
+
+
+class TokenBucket:
+    """Async token bucket refilled continuously at `rate_per_minute`."""
+
+    def __init__(self, rate_per_minute: float):
+        self.capacity = rate_per_minute
+        self.rate_per_second = rate_per_minute / 60.0
+        self._tokens = rate_per_minute
+        self._updated = time.monotonic()
+        self._lock: Optional[asyncio.Lock] = None
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate_per_second)
+        self._updated = now
+
+    async def acquire(self, amount: float):
+        # A request larger than the whole bucket waits for a full bucket rather than forever.
+        amount = min(amount, self.capacity)
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        # The lock keeps waiters in FIFO order so large requests are not starved by small ones.
+        async with self._lock:
+            self._refill()
+            while self._tokens < amount:
+                await asyncio.sleep((amount - self._tokens) / self.rate_per_second)
+                self._refill()
+            self._tokens -= amount
+
+
+class RateLimiter:
+    """Caps in-flight requests and, optionally, estimated tokens per minute."""
+
+    def __init__(self, max_in_flight: int, tokens_per_minute: Optional[float] = None):
+        self.max_in_flight = max_in_flight
+        # Created on first use so the semaphore belongs to the server's event loop.
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._bucket = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self.waiting = 0
+
+    @asynccontextmanager
+    async def limit(self, estimated_tokens: int = 0):
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_in_flight)
+        self.waiting += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self.waiting -= 1
+        try:
+            if self._bucket is not None and estimated_tokens:
+                await self._bucket.acquire(estimated_tokens)
+            yield
+        finally:
+            self._slots.release()
@@ -0,0 +1,83 @@
+import secrets
+from contextlib import asynccontextmanager
+from typing import Dict, Set
+
+from utils.history import ConversationHistory
+from utils.cache_backends import CacheBackend
+
+
+class SessionNotFound(KeyError):
+    """The session never existed, was deleted, or was evicted after sitting idle."""
+
+
+class SessionBusy(RuntimeError):
+    """A turn is already running for this session."""
+
+
+class SessionConflict(RuntimeError):
+    """Another turn saved the session while this one ran (on another worker), so this turn was not kept."""
+
+
+class SessionStore:
+    """Per-session conversation histories kept in a pluggable CacheBackend.
+
+    A session idle for `idle_seconds` is evicted: every saved turn restarts its
+    clock. With a backend shared by all uvicorn workers (SQLiteBackend) any
+    worker can serve any turn. A worker only knows about its own running
+    turns, so a turn is saved with compare_and_set(): it is dropped if another
+    worker's turn saved the session first or the session was deleted meanwhile.
+    """
+
+    def __init__(self, backend: CacheBackend, idle_seconds: float, max_tokens: int, keep_recent_turns: int,
+                 system_prompt: str):
+        self.backend = backend
+        self.idle_seconds = idle_seconds
+        self.max_tokens = max_tokens
+        self.keep_recent_turns = keep_recent_turns
+        self.system_prompt = system_prompt
+        self._running: Set[str] = set()
+
+    def create(self) -> str:
+        session_id = secrets.token_urlsafe(16)
+        history = ConversationHistory(self.max_tokens, self.keep_recent_turns)
+        history.append({"role": "system", "content": self.system_prompt})
+        self.save(session_id, history)
+        return session_id
+
+    def load(self, session_id: str) -> ConversationHistory:
+        data = self.backend.get(session_id)
+        if data is None:
+            raise SessionNotFound(session_id)
+        return ConversationHistory.from_dict(data, self.max_tokens, self.keep_recent_turns)
+
+    def save(self, session_id: str, history: ConversationHistory):
+        self.backend.set(session_id, history.to_dict(), self.idle_seconds)
+
+    def delete(self, session_id: str):
+        self.backend.delete(session_id)
+
+    def is_running(self, session_id: str) -> bool:
+        return session_id in self._running
+
+    @asynccontextmanager
+    async def turn(self, session_id: str):
+        """Yields the session's history and saves it if the block completes; on error or cancellation the turn is dropped."""
+        if session_id in self._running:
+            raise SessionBusy(session_id)
+        entry = self.backend.get_versioned(session_id)
+        if entry is None:
+            raise SessionNotFound(session_id)
+        data, version = entry
+        history = ConversationHistory.from_dict(data, self.max_tokens, self.keep_recent_turns)
+        self._running.add(session_id)
+        try:
+            yield history
+            if not self.backend.compare_and_set(session_id, history.to_dict(), self.idle_seconds, version):
+                if self.backend.get(session_id) is None:
+                    raise SessionNotFound(session_id)
+                raise SessionConflict(session_id)
+        finally:
+            self._running.discard(session_id)
+
+    def stats(self) -> Dict[str, int]:
+        return {"sessions": self.backend.size(), "running_turns": len(self._running)}
@@ -0,0 +1,283 @@
+"""Hashed TF-IDF vectors of paper titles and abstracts, for re-ranking and de-duplicating search results.
+
+Each paper becomes a fixed-width row (words and word pairs hashed into `dim`
+signed buckets, sublinear term frequency) in a NumPy matrix. IDF weights come
+from bucket document frequencies and are applied at query time, so adding
+papers never rewrites stored rows. Saved indexes above `mmap_rows` rows are
+memory-mapped on load instead of read into memory.
+
+The paper_search server keeps it in step with the local arXiv index; it can
+also be rebuilt from that index ahead of time:
+
+    python -m utils.similarity rebuild
+"""
+import argparse
+import json
+import os
+import re
+import threading
+import zlib
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # optional; without it search results keep their original order
+    np = None
+
+from utils.arxiv_index import paper_key
+
+AVAILABLE = np is not None
+
+WORD = re.compile(r"\w+", re.UNICODE)
+
+# Title terms count this many times over abstract terms.
+TITLE_WEIGHT = 2.0
+# IDF weights are refreshed (all row norms recomputed) once the corpus has grown by this fraction.
+IDF_REFRESH_GROWTH = 0.1
+# Rows per block when recomputing norms, to bound temporary memory.
+NORM_BLOCK_ROWS = 16384
+
+
+def _field(paper: Any, name: str) -> str:
+    # Papers arrive as utils.arxiv_feed.Paper records or, from JSON caches, as plain dicts.
+    value = paper.get(name) if isinstance(paper, dict) else getattr(paper, name, None)
+    return value or ""
+
+
+def _terms(text: str) -> List[str]:
+    words = WORD.findall(text.lower())
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+class SimilarityIndex:
+    def __init__(self, directory: Optional[str], dim: int = 512, mmap_rows: int = 50000):
+        if np is None:
+            raise RuntimeError("SimilarityIndex needs numpy (pip install numpy).")
+        self.directory = directory
+        self.dim = dim
+        self.mmap_rows = mmap_rows
+        self._lock = threading.Lock()
+        self._keys: List[str] = []
+        self._rows: Dict[str, int] = {}
+        # Saved rows (possibly a copy-on-write memmap) plus rows added since, grown by doubling.
+        self._base = np.zeros((0, dim), dtype=np.float32)
+        self._tail = np.zeros((64, dim), dtype=np.float32)
+        self._tail_len = 0
+        self._df = np.zeros(dim, dtype=np.int64)
+        self._idf = np.ones(dim, dtype=np.float32)
+        self._idf_docs = 0
+        self._norms = np.zeros(64, dtype=np.float32)
+
+    # --- vectors ---
+
+    def vectorize(self, title: str, summary: str = "") -> "np.ndarray":
+        """Sublinear-TF hashed vector of one text (IDF is applied when scoring)."""
+        counts = Counter(_terms(summary))
+        for term in _terms(title):
+            counts[term] += TITLE_WEIGHT
+        # crc32 is stable across processes (hash() is not), so saved vectors stay valid.
+        hashes = np.fromiter((zlib.crc32(term.encode("utf-8")) for term in counts), dtype=np.uint32, count=len(counts))
+        weights = 1.0 + np.log(np.fromiter(counts.values(), dtype=np.float64, count=len(counts)))
+        # The top bit picks a sign so colliding terms tend to cancel rather than add up.
+        weights[hashes >= 0x80000000] *= -1.0
+        return np.bincount(hashes % self.dim, weights, minlength=self.dim).astype(np.float32)
+
+    def _vectorize_papers(self, papers: Sequence[Any]) -> "np.ndarray":
+        matrix = np.zeros((len(papers), self.dim), dtype=np.float32)
+        for i, paper in enumerate(papers):
+            matrix[i] = self.vectorize(_field(paper, "title"), _field(paper, "summary"))
+        return matrix
+
+    def _weighted_unit(self, matrix: "np.ndarray") -> "np.ndarray":
+        weighted = matrix * self._idf
+        norms = np.linalg.norm(weighted, axis=1, keepdims=True)
+        return weighted / np.maximum(norms, 1e-12)
+
+    # --- storage ---
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def _row(self, index: int) -> "np.ndarray":
+        base_len = len(self._base)
+        return self._base[index] if index < base_len else self._tail[index - base_len]
+
+    def _set_row(self, index: int, vector: "np.ndarray"):
+        base_len = len(self._base)
+        if index < base_len:
+            self._base[index] = vector
+        else:
+            self._tail[index - base_len] = vector
+
+    def _parts(self) -> List["np.ndarray"]:
+        return [self._base, self._tail[:self._tail_len]]
+
+    def add(self, papers: Iterable[Any]) -> int:
+        """Inserts or replaces papers (keyed like utils.arxiv_index); returns how many were given."""
+        papers = list(papers)
+        if not papers:
+            return 0
+        vectors = self._vectorize_papers(papers)
+        with self._lock:
+            for paper, vector in zip(papers, vectors):
+                key = paper_key(_field(paper, "title"), _field(paper, "pdf_url") or None)
+                index = self._rows.get(key)
+                if index is not None:
+                    self._df -= self._row(index) != 0
+                    self._set_row(index, vector)
+                else:
+                    index = len(self._keys)
+                    if self._tail_len == len(self._tail):
+                        self._tail = np.concatenate([self._tail, np.zeros_like(self._tail)])
+                    self._tail[self._tail_len] = vector
+                    self._tail_len += 1
+                    self._keys.append(key)
+                    self._rows[key] = index
+                self._df += vector != 0
+                if index >= len(self._norms):
+                    self._norms = np.concatenate([self._norms, np.zeros(max(len(self._norms), 64), dtype=np.float32)])
+                self._norms[index] = np.linalg.norm(vector * self._idf)
+            if len(self._keys) > self._idf_docs * (1 + IDF_REFRESH_GROWTH):
+                self._refresh_idf()
+        return len(papers)
+
+    def _refresh_idf(self):
+        n = len(self._keys)
+        self._idf = (np.log((1 + n) / (1 + self._df)) + 1.0).astype(np.float32)
+        self._idf_docs = n
+        squared = self._idf * self._idf
+        offset = 0
+        for part in self._parts():
+            for start in range(0, len(part), NORM_BLOCK_ROWS):
+                block = part[start:start + NORM_BLOCK_ROWS]
+                self._norms[offset + start:offset + start + len(block)] = np.sqrt((block * block) @ squared)
+            offset += len(part)
+
+    # --- queries ---
+
+    def scores(self, queries: "np.ndarray") -> "np.ndarray":
+        """Cosine similarity of each query vector (rows of `queries`) to every stored paper, shape (queries, papers)."""
+        with self._lock:
+            weighted = self._weighted_unit(np.atleast_2d(queries)) * self._idf
+            blocks = [part @ weighted.T for part in self._parts() if len(part)]
+            if not blocks:
+                return np.zeros((len(weighted), 0), dtype=np.float32)
+            norms = self._norms[:len(self._keys)]
+            return (np.concatenate(blocks) / np.maximum(norms, 1e-12)[:, None]).T
+
+    def rank(self, query: str, papers: Sequence[Any], max_results: int, duplicate_threshold: float) -> List[Any]:
+        """Orders `papers` by similarity to `query`, dropping any paper too similar to one ranked above it."""
+        if not papers:
+            return []
+        with self._lock:
+            query_vector = self._weighted_unit(self.vectorize(query)[None, :])[0]
+            candidates = self._weighted_unit(self._vectorize_papers(papers))
+        relevance = candidates @ query_vector
+        # Stable sort keeps the original (newest-first) order among equally relevant papers.
+        order = np.argsort(-relevance, kind="stable")
+        kept: List[int] = []
+        for i in order:
+            if kept and float(np.max(candidates[kept] @ candidates[i])) >= duplicate_threshold:
+                continue
+            kept.append(int(i))
+            if len(kept) == max_results:
+                break
+        return [papers[i] for i in kept]
+
+    def similar(self, key: str, max_results: int, duplicate_threshold: float) -> List[Tuple[str, float]]:
+        """Keys and scores of the stored papers most like the paper stored under `key` (near-copies excluded)."""
+        with self._lock:
+            index = self._rows.get(key)
+            if index is None:
+                raise KeyError(key)
+            vector = np.array(self._row(index))
+        scores = self.scores(vector)[0]
+        scores[index] = -1.0
+        top = min(max_results * 4 + 1, len(scores))
+        candidates = np.argpartition(-scores, top - 1)[:top] if top < len(scores) else np.arange(len(scores))
+        results = []
+        for i in candidates[np.argsort(-scores[candidates], kind="stable")]:
+            if scores[i] <= 0 or len(results) == max_results:
+                break
+            if scores[i] < duplicate_threshold:
+                results.append((self._keys[i], float(scores[i])))
+        return results
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._rows
+
+    # --- persistence ---
+
+    def _paths(self) -> Tuple[str, str, str]:
+        return (
+            os.path.join(self.directory, "vectors.npy"),
+            os.path.join(self.directory, "keys.json"),
+            os.path.join(self.directory, "df.npy"),
+        )
+
+    def load(self) -> int:
+        """Loads a saved index (memory-mapped above `mmap_rows` rows); returns the rows loaded."""
+        vectors_path, keys_path, df_path = self._paths()
+        try:
+            with open(keys_path, encoding="utf-8") as f:
+                keys = json.load(f)
+            mmap_mode = "c" if len(keys) >= self.mmap_rows else None
+            base = np.load(vectors_path, mmap_mode=mmap_mode)
+            df = np.load(df_path)
+        except (OSError, ValueError):
+            return 0
+        if base.shape != (len(keys), self.dim) or df.shape != (self.dim,):
+            return 0  # Saved with another dim, or half-written: rebuild instead.
+        with self._lock:
+            self._base = base
+            self._tail_len = 0
+            self._keys = list(keys)
+            self._rows = {key: i for i, key in enumerate(self._keys)}
+            self._df = df.astype(np.int64)
+            self._norms = np.zeros(max(len(keys), 64), dtype=np.float32)
+            self._refresh_idf()
+        return len(keys)
+
+    def save(self):
+        """Writes the index atomically next to any previous copy, so readers never see a partial one."""
+        os.makedirs(self.directory, exist_ok=True)
+        suffix = f".{os.getpid()}.tmp"
+        vectors_path, keys_path, df_path = self._paths()
+        with self._lock:
+            out = np.lib.format.open_memmap(vectors_path + suffix, mode="w+", dtype=np.float32,
+                                            shape=(len(self._keys), self.dim))
+            offset = 0
+            for part in self._parts():
+                out[offset:offset + len(part)] = part
+                offset += len(part)
+            out.flush()
+            del out
+            np.save(df_path + suffix, self._df)
+            with open(keys_path + suffix, "w", encoding="utf-8") as f:
+                json.dump(self._keys, f)
+        # np.save appends ".npy" to names that lack it.
+        os.replace(df_path + suffix + ".npy", df_path)
+        os.replace(vectors_path + suffix, vectors_path)
+        os.replace(keys_path + suffix, keys_path)
+
+
+def main():
+    from config import ARXIV_INDEX_PATH, SIMILARITY_INDEX_DIR, SIMILARITY_DIM, SIMILARITY_MMAP_ROWS
+    from utils.arxiv_index import ArxivIndex
+
+    parser = argparse.ArgumentParser(description="Maintain the local paper similarity index.")
+    parser.add_argument("--index", default=ARXIV_INDEX_PATH)
+    parser.add_argument("--out", default=SIMILARITY_INDEX_DIR)
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("rebuild", help="re-vectorize every paper in the local arXiv index")
+    args = parser.parse_args()
+
+    index = SimilarityIndex(args.out, SIMILARITY_DIM, SIMILARITY_MMAP_ROWS)
+    added = sum(index.add(batch) for batch in ArxivIndex(args.index).iter_papers())
+    index.save()
+    print(f"Vectorized {added} papers into {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""Server-sent events: encoding on the servers, parsing in their clients."""
+import json
+from typing import Any, AsyncIterable, AsyncIterator, Dict, Iterable, Iterator, Tuple
+
+from utils import fast_json
+
+
+def encode(event: str, data: Dict[str, Any]) -> bytes:
+    return b"event: " + event.encode("ascii") + b"\ndata: " + fast_json.dumps(data) + b"\n\n"
+
+
+class _Parser:
+    def __init__(self):
+        self.event = "message"
+
+    def feed(self, line: str):
+        """Returns (event, data) when `line` completes an event's data, else None."""
+        if line.startswith("event:"):
+            self.event = line[len("event:"):].strip()
+        elif line.startswith("data:"):
+            return self.event, json.loads(line[len("data:"):])
+        elif not line:
+            self.event = "message"
+        return None
+
+
+def iter_events(lines: Iterable[str]) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """(event, data) pairs from decoded lines, e.g. requests' iter_lines(decode_unicode=True)."""
+    parser = _Parser()
+    for line in lines:
+        parsed = parser.feed(line)
+        if parsed is not None:
+            yield parsed
+
+
+async def aiter_events(lines: AsyncIterable[str]) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+    """Async counterpart of iter_events, e.g. for httpx's aiter_lines()."""
+    parser = _Parser()
+    async for line in lines:
+        parsed = parser.feed(line)
+        if parsed is not None:
+            yield parsed
@@ -0,0 +1,71 @@
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from utils.singleflight import SingleFlight
+
+
+def summary_key(text: str, model: str, prompt_version: str) -> str:
+    text_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    return f"{text_hash}:{model}:{prompt_version}"
+
+
+class SummaryCache:
+    """In-memory TTL + LRU cache of LLM summaries with single-flight de-duplication."""
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._flight = SingleFlight()
+        self.stats_counters = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0}
+
+    def get(self, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        stored_at, summary = entry
+        if time.monotonic() - stored_at > self.ttl_seconds:
+            del self._entries[key]
+            self.stats_counters["expirations"] += 1
+            return None
+        self._entries.move_to_end(key)
+        return summary
+
+    def put(self, key: str, summary: str):
+        self._entries[key] = (time.monotonic(), summary)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats_counters["evictions"] += 1
+
+    async def get_or_compute(self, key: str, compute: Callable[[], Awaitable[str]]) -> str:
+        """Returns the cached summary for `key`, or runs `compute` exactly once across concurrent callers."""
+        summary = self.get(key)
+        if summary is not None:
+            self.stats_counters["hits"] += 1
+            return summary
+
+        if not self._flight.in_flight(key):
+            self.stats_counters["misses"] += 1
+
+        async def compute_and_store() -> str:
+            result = await compute()
+            self.put(key, result)
+            return result
+
+        return await self._flight.do(key, compute_and_store)
+
+    def stats(self) -> Dict[str, Any]:
+        # Requests that joined an in-flight computation were served without their own LLM call.
+        hits = self.stats_counters["hits"] + self._flight.coalesced
+        lookups = hits + self.stats_counters["misses"]
+        return {
+            **self.stats_counters,
+            "coalesced": self._flight.coalesced,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hit_ratio": hits / lookups if lookups else 0.0,
+        }
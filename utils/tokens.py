@@ -0,0 +1,26 @@
+from functools import lru_cache
+
+try:
+    import tiktoken
+except ImportError:  # optional; fall back to a character heuristic
+    tiktoken = None
+
+# Rough average for English prose with OpenAI-style BPE vocabularies.
+CHARS_PER_TOKEN = 4
+
+
+@lru_cache(maxsize=None)
+def _encoding(model: str):
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("cl100k_base")
+
+
+def count_tokens(text: str, model: str = "gpt-4o") -> int:
+    """Token count of `text`, exact when tiktoken is installed and estimated otherwise."""
+    if not text:
+        return 0
+    if tiktoken is None:
+        return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+    return len(_encoding(model).encode(text, disallowed_special=()))
@@ -0,0 +1,349 @@
+"""HTTP transport from the chat agent to the tool servers.
+
+One AsyncToolTransport per server holds a keep-alive httpx pool and adds, per call:
+- an overall deadline, passed on to the server in the DEADLINE_HEADER header
+- retries with jittered exponential backoff (idempotent calls only)
+- optional hedging: a second identical request once the first has been
+  outstanding longer than a latency quantile
+- a circuit breaker that fails fast while the server keeps failing
+"""
+import asyncio
+import random
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional
+
+import httpx
+
+from utils.deadline import DEADLINE_HEADER
+from utils.metrics import REGISTRY
+
+# 429 is the extraction pool's backpressure signal: retried, but not a sign of an unhealthy server.
+RETRYABLE_STATUS = {429, 502, 503, 504}
+BREAKER_STATUS = {500, 502, 503, 504}
+
+TRANSPORT_EVENTS = REGISTRY.counter(
+    "scout_tool_transport_events_total", "Retries, hedges and fast failures per tool server.", ("tool", "event")
+)
+
+
+# httpx errors, so callers handle them with the rest of httpx.HTTPError.
+class CircuitOpenError(httpx.TransportError):
+    """Raised without contacting the server while its circuit breaker is open."""
+
+
+class DeadlineExceeded(httpx.TimeoutException):
+    """Raised when a call's overall deadline passes before a usable response arrives."""
+
+
+class CircuitBreaker:
+    """Opens after `failure_threshold` consecutive failures; after `reset_seconds` lets one probe through."""
+
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        return "half_open" if self._probing else "open"
+
+    def allow(self) -> bool:
+        if self._opened_at is None:
+            return True
+        if self._probing or time.monotonic() - self._opened_at < self.reset_seconds:
+            return False
+        self._probing = True
+        return True
+
+    def record_success(self):
+        self._failures = 0
+        self._opened_at = None
+        self._probing = False
+
+    def record_failure(self):
+        self._failures += 1
+        if self._probing or self._failures >= self.failure_threshold:
+            self._opened_at = time.monotonic()
+        self._probing = False
+
+    def abandon(self):
+        """An attempt ended without a result (cancelled or an unexpected error); an unfinished probe counts as failed."""
+        if self._probing:
+            self._opened_at = time.monotonic()
+            self._probing = False
+
+
+class LatencyWindow:
+    """Recent successful call latencies, for picking the hedging delay."""
+
+    def __init__(self, size: int = 200, min_samples: int = 20):
+        self.min_samples = min_samples
+        self._samples: deque = deque(maxlen=size)
+
+    def add(self, seconds: float):
+        self._samples.append(seconds)
+
+    def quantile(self, q: float) -> Optional[float]:
+        if len(self._samples) < self.min_samples:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class AsyncToolTransport:
+    """Tool server transport for use inside async servers.
+
+    One httpx.AsyncClient (created in start()) holds the keep-alive pool, so any
+    number of concurrent callers share `pool_size` connections per server. All
+    calls run on one event loop, so the breaker and latency window need no locks.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        base_url: str,
+        pool_size: int,
+        deadline: float,
+        attempt_timeout: float,
+        max_retries: int,
+        backoff_base: float,
+        backoff_max: float,
+        hedge_quantile: float,
+        breaker_failures: int,
+        breaker_reset_seconds: float,
+    ):
+        self.name = name
+        self.base_url = base_url.rstrip("/")
+        self.pool_size = pool_size
+        self.deadline = deadline
+        self.attempt_timeout = attempt_timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.hedge_quantile = hedge_quantile
+        self.breaker = CircuitBreaker(breaker_failures, breaker_reset_seconds)
+        self.latencies = LatencyWindow()
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def _deadline_at(self, deadline: Optional[float]) -> float:
+        return time.monotonic() + (deadline if deadline is not None else self.deadline)
+
+    def _attempt_timeout(self, deadline_at: float) -> float:
+        """Timeout for the next attempt; raises if the breaker is open or the deadline has passed."""
+        if not self.breaker.allow():
+            TRANSPORT_EVENTS.inc(tool=self.name, event="circuit_open")
+            raise CircuitOpenError(f"{self.name} server is unavailable (circuit open); try again later.")
+        remaining = deadline_at - time.monotonic()
+        if remaining <= 0:
+            TRANSPORT_EVENTS.inc(tool=self.name, event="deadline_exceeded")
+            raise DeadlineExceeded(f"{self.name} call exceeded its deadline.")
+        return min(self.attempt_timeout, remaining)
+
+    def _record(self, status_code: Optional[int], started: float) -> bool:
+        """Updates the breaker for one attempt (None: it failed to connect or timed out); True if the response is final."""
+        if status_code is None:
+            self.breaker.record_failure()
+            return False
+        if status_code in BREAKER_STATUS:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        if status_code in RETRYABLE_STATUS:
+            return False
+        if status_code < 400:
+            self.latencies.add(time.monotonic() - started)
+        return True
+
+    def _retry_delay(self, attempt: int, idempotent: bool, deadline_at: float, retry_after: float) -> Optional[float]:
+        """Seconds to wait before retrying, or None when the call should give up."""
+        backoff = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        delay = max(backoff, retry_after)
+        if not idempotent or attempt >= self.max_retries or time.monotonic() + delay >= deadline_at:
+            return None
+        TRANSPORT_EVENTS.inc(tool=self.name, event="retry")
+        return delay
+
+    def _hedge_after(self, timeout: float) -> Optional[float]:
+        hedge_after = self.latencies.quantile(self.hedge_quantile) if self.hedge_quantile else None
+        return hedge_after if hedge_after is not None and hedge_after < timeout else None
+
+    async def start(self):
+        if self._client is None:
+            limits = httpx.Limits(max_connections=self.pool_size, max_keepalive_connections=self.pool_size)
+            # Timeouts come from each call's deadline instead (see _send).
+            self._client = httpx.AsyncClient(base_url=self.base_url, limits=limits, timeout=None)
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def post(
+        self, path: str, payload: Dict[str, Any], idempotent: bool = True, deadline: Optional[float] = None,
+    ) -> httpx.Response:
+        """POSTs JSON and returns the read response (raise_for_status is left to the caller)."""
+        return await self._call(path, payload, idempotent, False, self._deadline_at(deadline))
+
+    @asynccontextmanager
+    async def stream(
+        self, path: str, payload: Dict[str, Any], deadline: Optional[float] = None,
+    ) -> AsyncIterator[httpx.Response]:
+        """POSTs JSON and yields the response as soon as its headers arrive; retried only until then.
+
+        Reading the body is bound by the same deadline: a stalled or slow server
+        raises DeadlineExceeded from the caller's iteration.
+        """
+        deadline_at = self._deadline_at(deadline)
+        response = await self._call(path, payload, True, True, deadline_at)
+        response.stream = _DeadlineStream(response.stream, deadline_at, self.name)
+        try:
+            yield response
+        finally:
+            await response.aclose()
+
+    async def _call(
+        self, path: str, payload: Dict[str, Any], idempotent: bool, stream: bool, deadline_at: float,
+    ) -> httpx.Response:
+        attempt = 0
+        while True:
+            timeout = self._attempt_timeout(deadline_at)
+            started = time.monotonic()
+            error: Optional[Exception] = None
+            response: Optional[httpx.Response] = None
+            try:
+                if idempotent and not stream and self.hedge_quantile:
+                    response = await self._send_hedged(path, payload, timeout)
+                else:
+                    response = await self._send(path, payload, timeout, stream)
+            except httpx.TransportError as e:
+                error = e
+            except BaseException:
+                # Cancelled (e.g. the client went away) or failed oddly: never leave the breaker half-open.
+                self.breaker.abandon()
+                raise
+            if self._record(response.status_code if response is not None else None, started):
+                return response
+
+            delay = self._retry_delay(attempt, idempotent, deadline_at, _retry_after(response))
+            if delay is None:
+                if error is not None:
+                    raise error
+                return response
+            if response is not None:
+                await response.aclose()
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def _send(self, path: str, payload: Dict[str, Any], timeout: float, stream: bool = False) -> httpx.Response:
+        if self._client is None:
+            raise RuntimeError("AsyncToolTransport used before start() was awaited.")
+        # The httpx timeout also bounds each read of a streamed body.
+        request = self._client.build_request(
+            "POST", path, json=payload, headers={DEADLINE_HEADER: f"{timeout:.3f}"}, timeout=httpx.Timeout(timeout),
+        )
+        try:
+            return await asyncio.wait_for(self._client.send(request, stream=stream), timeout)
+        except asyncio.TimeoutError:
+            raise httpx.ReadTimeout(f"{self.name} call timed out after {timeout:.1f}s.", request=request)
+
+    async def _send_hedged(self, path: str, payload: Dict[str, Any], timeout: float) -> httpx.Response:
+        hedge_after = self._hedge_after(timeout)
+        if hedge_after is None:
+            return await self._send(path, payload, timeout)
+
+        started = time.monotonic()
+        primary = asyncio.ensure_future(self._send(path, payload, timeout))
+        pending = {primary}
+        fallback: Optional[httpx.Response] = None
+        first_error: Optional[BaseException] = None
+        try:
+            done, pending = await asyncio.wait(pending, timeout=hedge_after)
+            if done:
+                return primary.result()
+
+            TRANSPORT_EVENTS.inc(tool=self.name, event="hedge")
+            remaining = timeout - (time.monotonic() - started)
+            hedge = asyncio.ensure_future(self._send(path, payload, max(remaining, 0.001)))
+            pending = {primary, hedge}
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is not None:
+                        first_error = first_error or task.exception()
+                        continue
+                    response = task.result()
+                    if _usable(response) and not _usable(fallback):
+                        if task is hedge:
+                            TRANSPORT_EVENTS.inc(tool=self.name, event="hedge_won")
+                        response, fallback = fallback, response
+                    elif fallback is None:
+                        response, fallback = None, response
+                    # Whichever response is not kept is closed.
+                    if response is not None:
+                        await response.aclose()
+                if _usable(fallback):
+                    return fallback
+            # Neither request got a usable response: hand back the failed one for the retry logic.
+            if fallback is not None:
+                return fallback
+            raise first_error
+        except BaseException:
+            if fallback is not None:
+                await fallback.aclose()
+            raise
+        finally:
+            for task in pending:
+                task.cancel()
+                task.add_done_callback(_aclose_response)
+
+
+class _DeadlineStream(httpx.AsyncByteStream):
+    """A streamed response body that raises DeadlineExceeded once the call's deadline passes."""
+
+    def __init__(self, stream: httpx.AsyncByteStream, deadline_at: float, name: str):
+        self._stream = stream
+        self._deadline_at = deadline_at
+        self._name = name
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        chunks = self._stream.__aiter__()
+        while True:
+            remaining = self._deadline_at - time.monotonic()
+            try:
+                if remaining <= 0:
+                    raise asyncio.TimeoutError
+                chunk = await asyncio.wait_for(chunks.__anext__(), remaining)
+            except StopAsyncIteration:
+                return
+            except asyncio.TimeoutError:
+                TRANSPORT_EVENTS.inc(tool=self._name, event="deadline_exceeded")
+                raise DeadlineExceeded(f"{self._name} call exceeded its deadline while streaming.") from None
+            yield chunk
+
+    async def aclose(self):
+        await self._stream.aclose()
+
+
+def _usable(response: Optional[httpx.Response]) -> bool:
+    return response is not None and response.status_code < 500 and response.status_code not in RETRYABLE_STATUS
+
+
+def _aclose_response(task: "asyncio.Task"):
+    # A losing request that completed before it could be cancelled.
+    if not task.cancelled() and task.exception() is None:
+        asyncio.ensure_future(task.result().aclose())
+
+
+def _retry_after(response: Optional[httpx.Response]) -> float:
+    if response is None:
+        return 0.0
+    try:
+        return float(response.headers.get("Retry-After", 0))
+    except ValueError:
+        return 0.0